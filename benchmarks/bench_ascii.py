@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+'''Measure the per-note cost of the ASCII formatter as the line length grows.
+
+Run from the top-level directory: python3 benchmarks/bench_ascii.py
+'''
+
+import io
+import os
+import sys
+import time
+from fractions import Fraction
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab
+from vtab import tunings
+
+COUNT = 100000
+
+def run(line_length):
+	fmt = vtab.AsciiFormatter(line_length=line_length)
+	fmt.set_file(io.StringIO())
+	notes = tunings.chord((0, 2, 2, 1, 0, 0))
+	duration = Fraction(1, 4)
+
+	start = time.perf_counter()
+	for i in range(COUNT):
+		fmt.format_note(notes, duration, False)
+		if i % 8 == 7:
+			fmt.format_barline({})
+	fmt.flush()
+	return time.perf_counter() - start
+
+for line_length in (80, 800, 8000, 80000, None):
+	elapsed = run(line_length)
+	print('line_length %9s %8.3f us/note' % (line_length, 1e6 * elapsed / COUNT))
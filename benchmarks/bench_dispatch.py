@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+'''Measure the cost of dispatching parser events to several formatters.
+
+Events are sent to the ASCII, dummy and lilypond formatters (the same
+set the parser unit tests attach) and to a formatter that ignores every
+event (so the cost of the dispatch itself is visible). The uncached
+figures reproduce the old dispatch, which looked up every handler for
+every event.
+
+Run from the top-level directory: python3 benchmarks/bench_dispatch.py
+'''
+
+import io
+import os
+import sys
+import time
+from fractions import Fraction
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab
+from vtab import tunings
+
+COUNT = 100000
+
+class NullFormatter(vtab.Formatter):
+	def set_file(self, f):
+		pass
+
+	def format_comment(self, comment):
+		pass
+
+	def format_duration(self, duration):
+		pass
+
+	def format_barline(self, attributes):
+		pass
+
+	def format_note(self, notes, duration, tie):
+		pass
+
+def make_parser(formatters):
+	p = vtab.VtabParser()
+	for fmt in formatters:
+		fmt.set_file(io.StringIO())
+		p.add_formatter(fmt)
+	return p
+
+def uncached(p):
+	'''Dispatch events the way the parser used to.'''
+	def format_attribute(key, value):
+		for formatter in p.formatters:
+			formatter.format_attribute(key, value)
+	def format_note(notes, duration, tied):
+		for formatter in p.formatters:
+			formatter.format_note(notes, duration, tied)
+	return (format_attribute, format_note)
+
+def run(format_attribute, format_note):
+	notes = tunings.chord((0, 2, 2, 1, 0, 0))
+	duration = Fraction(1, 8)
+
+	start = time.perf_counter()
+	for i in range(COUNT):
+		format_attribute('duration', duration)
+		format_note(notes, duration, False)
+	return time.perf_counter() - start
+
+def all_formatters():
+	return (vtab.AsciiFormatter(), vtab.DummyFormatter(),
+		vtab.LilypondFormatter(), NullFormatter())
+
+def null_formatters():
+	return (NullFormatter(), NullFormatter(), NullFormatter())
+
+for (name, factory) in (('3 null formatters', null_formatters),
+			('ascii+dummy+ly+null', all_formatters)):
+	p = make_parser(factory())
+	elapsed = run(*uncached(p))
+	print('%-20s uncached %8.3f us/event' % (name, 1e6 * elapsed / (2 * COUNT)))
+	p = make_parser(factory())
+	elapsed = run(p.format_attribute, p.format_note)
+	print('%-20s cached   %8.3f us/event' % (name, 1e6 * elapsed / (2 * COUNT)))
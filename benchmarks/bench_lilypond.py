@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+'''Measure the time taken to convert a long tab into lilypond.
+
+The tab is synthesised by repeating the body of examples/scale.vtab.
+
+Run from the top-level directory: python3 benchmarks/bench_lilypond.py
+'''
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab
+
+REPEATS = 2000
+
+def long_tab():
+	fname = os.path.join(os.path.dirname(__file__), '..', 'examples', 'scale.vtab')
+	with open(fname) as f:
+		lines = f.readlines()
+	body = [ln for ln in lines if vtab.VtabParser.RE_NOTE.match(ln)]
+	return lines[:lines.index(body[0])] + body * REPEATS
+
+lines = long_tab()
+p = vtab.VtabParser()
+fmt = vtab.LilypondFormatter()
+fmt.set_file(io.StringIO())
+p.add_formatter(fmt)
+
+start = time.perf_counter()
+p.parse_file(lines)
+elapsed = time.perf_counter() - start
+print('%d lines in %.3f s (%.0f lines/s)' % (len(lines), elapsed, len(lines) / elapsed))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+'''Measure the cost of constructing vtab.note.Note objects.
+
+Run from the top-level directory: python3 benchmarks/bench_note.py
+'''
+
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab.note
+from vtab.note import Note
+from vtab import tunings
+
+COUNT = 1000000
+
+def build(count):
+	return [Note(40 + (i % 48)) for i in range(count)]
+
+def fret(count):
+	open_string = tunings.STANDARD_TUNING[0]
+	return [open_string + (i % 24) for i in range(count)]
+
+start = time.perf_counter()
+notes = build(COUNT)
+elapsed = time.perf_counter() - start
+del notes
+print('construct   %8.3f us/note' % (1e6 * elapsed / COUNT))
+
+tracemalloc.start()
+notes = build(COUNT)
+(current, unused) = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+del notes
+print('memory      %8.1f bytes/note' % (current / COUNT))
+
+start = time.perf_counter()
+notes = fret(COUNT)
+elapsed = time.perf_counter() - start
+del notes
+print('arithmetic  %8.3f us/note' % (1e6 * elapsed / COUNT))
+
+notes = [Note(pitch) for pitch in range(28, 88)]
+for (label, fn) in (('lilypond', lambda: [n.to_lilypond() for n in notes]),
+		    ('  computed', lambda: [vtab.note._to_lilypond(int(n)) for n in notes]),
+		    ('name', lambda: [str(n) for n in notes]),
+		    ('  computed', lambda: [vtab.note._name(int(n)) for n in notes])):
+	t = timeit.timeit(fn, number=10000)
+	print('%-11s %8.3f us/note' % (label, 1e6 * t / (10000 * len(notes))))
+
+names = [str(n) for n in notes]
+t = timeit.timeit(lambda: [Note(s) for s in names], number=10000)
+print('%-11s %8.3f us/note' % ('from name', 1e6 * t / (10000 * len(names))))
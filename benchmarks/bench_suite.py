@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+'''Measure the parser, with each formatter, over synthetic tabs.
+
+Each scenario generates a tab (see synth.py) which is then parsed with
+no formatter at all and with each of the formatters. The throughput
+(lines per second, the median of several runs) and the peak memory
+allocated whilst parsing (measured separately using tracemalloc) are
+reported and, optionally, saved as JSON. If a baseline (the JSON saved
+by an earlier run) is given then any result that has become slower, or
+uses more memory, than the baseline by more than the tolerance is
+reported and the exit status is non-zero.
+
+Run from the top-level directory:
+python3 benchmarks/bench_suite.py --output results.json
+python3 benchmarks/bench_suite.py --baseline results.json
+'''
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab
+import synth
+
+RESULTS_VERSION = 1
+
+SCENARIOS = (
+	('simple', dict(density=0.3, rhythm='simple')),
+	('chords', dict(density=0.8, rhythm='simple')),
+	('mixed', dict(density=0.3, rhythm='mixed', articulations=0.1)),
+	('complex', dict(density=0.5, rhythm='complex', articulations=0.2,
+			 repeats=0.5)),
+)
+
+FORMATTERS = (
+	('none', lambda: None),
+	('ascii', vtab.AsciiFormatter),
+	('lilypond', vtab.LilypondFormatter),
+	('lilypond-streaming', lambda: vtab.LilypondFormatter(streaming=True)),
+	('dummy', vtab.DummyFormatter),
+)
+
+class NullWriter(object):
+	'''Discard the output (so it does not count towards memory use).'''
+	def write(self, s):
+		pass
+
+	def flush(self):
+		pass
+
+def parse(lines, factory):
+	p = vtab.VtabParser()
+	fmt = factory()
+	if fmt is not None:
+		fmt.set_file(NullWriter())
+		p.add_formatter(fmt)
+	return p.parse_file(lines)
+
+def measure(lines, factory, runs):
+	elapsed = []
+	for i in range(runs):
+		start = time.perf_counter()
+		num_errors = parse(lines, factory)
+		elapsed.append(time.perf_counter() - start)
+		if num_errors:
+			raise RuntimeError('%d internal errors' % num_errors)
+
+	tracemalloc.start()
+	try:
+		parse(lines, factory)
+		(unused, peak) = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+
+	# The median is far less sensitive than the mean to the odd run
+	# disturbed by other activity on the machine
+	return (statistics.median(elapsed), peak)
+
+def compare(results, baseline, tolerance):
+	'''Return a description of every result that has regressed.'''
+	previous = {}
+	for r in baseline['results']:
+		previous[(r['scenario'], r['formatter'])] = r
+
+	regressions = []
+	for r in results:
+		old = previous.get((r['scenario'], r['formatter']))
+		if old is None or old['lines'] != r['lines']:
+			continue
+		slowdown = old['lines_per_second'] / r['lines_per_second'] - 1
+		if slowdown > tolerance:
+			regressions.append('%s/%s: %.0f lines/s (was %.0f, %.0f%% slower)' %
+					(r['scenario'], r['formatter'],
+					 r['lines_per_second'], old['lines_per_second'],
+					 100 * slowdown))
+		growth = r['peak_bytes'] / max(old['peak_bytes'], 1) - 1
+		if growth > tolerance:
+			regressions.append('%s/%s: %.1f peak KiB (was %.1f, %.0f%% more)' %
+					(r['scenario'], r['formatter'],
+					 r['peak_bytes'] / 1024, old['peak_bytes'] / 1024,
+					 100 * growth))
+	return regressions
+
+def main():
+	ap = argparse.ArgumentParser(
+			description='Benchmark the parser and formatters.')
+	ap.add_argument('--lines', type=int, default=20000,
+			help='length of each synthetic tab (default: %(default)s)')
+	ap.add_argument('--runs', type=int, default=9,
+			help='number of timed runs (default: %(default)s)')
+	ap.add_argument('--scenario', action='append',
+			choices=[name for (name, unused) in SCENARIOS],
+			help='run only this scenario (may be repeated)')
+	ap.add_argument('--formatter', action='append',
+			choices=[name for (name, unused) in FORMATTERS],
+			help='run only this formatter (may be repeated)')
+	ap.add_argument('-o', '--output', metavar='FILE',
+			help='save the results, as JSON, to FILE')
+	ap.add_argument('--baseline', metavar='FILE',
+			help='compare the results with those saved in FILE')
+	ap.add_argument('--tolerance', type=float, default=0.25,
+			help='maximum slowdown, or growth in peak memory, ' +
+			     'relative to the baseline (default: %(default)s)')
+	args = ap.parse_args()
+
+	results = []
+	print('%-10s %-20s %12s %12s' % ('scenario', 'formatter', 'lines/s', 'peak KiB'))
+	for (scenario, params) in SCENARIOS:
+		if args.scenario and scenario not in args.scenario:
+			continue
+		lines = synth.generate(args.lines, **params)
+
+		for (name, factory) in FORMATTERS:
+			if args.formatter and name not in args.formatter:
+				continue
+			(elapsed, peak) = measure(lines, factory, args.runs)
+			results.append({
+				'scenario': scenario,
+				'params': params,
+				'formatter': name,
+				'lines': len(lines),
+				'seconds': elapsed,
+				'lines_per_second': len(lines) / elapsed,
+				'peak_bytes': peak,
+			})
+			print('%-10s %-20s %12.0f %12.1f' % (scenario, name,
+					len(lines) / elapsed, peak / 1024))
+
+	if args.output:
+		with open(args.output, 'w') as f:
+			json.dump({
+				'version': RESULTS_VERSION,
+				'time': time.time(),
+				'python': platform.python_version(),
+				'platform': platform.platform(),
+				'results': results,
+			}, f, indent=1)
+			f.write('\n')
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			regressions = compare(results, json.load(f), args.tolerance)
+		for regression in regressions:
+			print('REGRESSION: ' + regression)
+		if regressions:
+			return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
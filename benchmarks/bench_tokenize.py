@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+'''Compare the fast tokenizer used by VtabParser with shlex.split().
+
+Run from the top-level directory: python3 benchmarks/bench_tokenize.py
+'''
+
+import os
+import shlex
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import vtab
+
+LINES = (
+	' | 3 | | | |  8',
+	' | | 0 | | |',
+	'12 14 14 13  12 12',
+	' | h2  |  |  |  |',
+	' 1 | | | | |  "text:Two words"',
+)
+NUMBER = 20000
+
+def run(label, fn):
+	t = timeit.timeit(lambda: [fn(ln) for ln in LINES], number=NUMBER)
+	nlines = NUMBER * len(LINES)
+	print('%-12s %8.3f us/line' % (label, 1e6 * t / nlines))
+	return t
+
+p = vtab.VtabParser()
+slow = run('shlex.split', shlex.split)
+fast = run('_tokenize', p._tokenize)
+print('speedup      %8.1fx' % (slow / fast))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+'''Generate synthetic vtab for benchmarking.
+
+The generated tab is always valid (it parses without errors and can be
+formatted by every formatter) but its shape can be varied:
+
+  lines:         approximate number of lines to generate
+  density:       probability that each string is played in a chord
+  rhythm:        'simple' (straight quavers), 'mixed' (crotchets, quavers
+                 and semiquavers, some held over several lines) or
+                 'complex' (mixed plus triplets, dotted notes, rests and
+                 notes tied across barlines)
+  articulations: probability that a played string is a hammer-on or
+                 pull-off
+  repeats:       probability that each section is repeated
+
+Run from the top-level directory to write a tab to stdout, for example:
+python3 benchmarks/synth.py --lines 100000 --rhythm complex > big.vtab
+'''
+
+import argparse
+import random
+import sys
+
+RHYTHMS = ('simple', 'mixed', 'complex')
+
+NOTES_PER_BAR = 8
+BARS_PER_SECTION = 4
+
+class _Generator(object):
+	def __init__(self, density, rhythm, articulations, repeats, seed):
+		if rhythm not in RHYTHMS:
+			raise ValueError('unknown rhythm: %s' % rhythm)
+		self.density = density
+		self.rhythm = rhythm
+		self.articulations = articulations
+		self.repeats = repeats
+		self.random = random.Random(seed)
+
+		self.lines = []
+		self.duration = None
+		self.played = False # True once the first note has been played
+		self.last_was_rest = True
+
+	def durations(self):
+		'''Choose a note length (as 1/n) and how many lines it spans.'''
+		rnd = self.random
+		if self.rhythm == 'simple':
+			return (8, 1)
+		if self.rhythm == 'mixed':
+			return (rnd.choice((4, 8, 8, 16, 16)), rnd.choice((1, 1, 1, 2)))
+		# Every span keeps the total length expressible as either 1/n or
+		# 3/n (a dotted note)
+		return (rnd.choice((2, 4, 8, 8, 12, 16, 16)), rnd.choice((1, 1, 2, 3)))
+
+	def chord(self):
+		rnd = self.random
+		strings = [rnd.random() < self.density for i in range(6)]
+		if not any(strings):
+			strings[rnd.randrange(6)] = True
+
+		columns = []
+		for played in strings:
+			if not played:
+				columns.append('|')
+				continue
+			fret = str(rnd.randint(0, 12))
+			if self.played and rnd.random() < self.articulations:
+				fret = rnd.choice('hp') + fret
+			columns.append(fret)
+		return columns
+
+	def note(self, new_bar):
+		rnd = self.random
+		(n, span) = self.durations()
+
+		if new_bar and not self.last_was_rest and \
+				self.rhythm == 'complex' and rnd.random() < 0.2:
+			# Tie the previous note across the barline
+			self.lines.append('| | | | | |')
+			return
+
+		rest = self.rhythm == 'complex' and rnd.random() < 0.1
+		if rest:
+			columns = ['|', '|', '|', ':', ':', ':']
+		else:
+			columns = self.chord()
+
+		decorations = []
+		if n != self.duration:
+			decorations.append(str(n))
+			self.duration = n
+		if not rest and rnd.random() < 0.05:
+			decorations.append('text:"%s"' % rnd.choice(('C', 'Dm', 'G7')))
+
+		self.lines.append(' '.join(columns + decorations))
+		for i in range(span - 1):
+			self.lines.append('| | | | | |')
+
+		self.played = self.played or not rest
+		self.last_was_rest = rest
+
+	def section(self, number):
+		repeat = self.random.random() < self.repeats
+		self.lines.append('# Section %d' % number)
+		self.lines.append('-----------:' if repeat else '-----------')
+		for bar in range(BARS_PER_SECTION):
+			if bar:
+				self.lines.append('-----------')
+			for i in range(NOTES_PER_BAR):
+				self.note(new_bar=(i == 0))
+		self.lines.append(':-----------' if repeat else '-----------')
+		self.lines.append('')
+
+def generate(lines=10000, density=0.3, rhythm='simple', articulations=0.0,
+	     repeats=0.0, seed=0):
+	'''Return a list of (newline terminated) lines of synthetic vtab.'''
+	gen = _Generator(density, rhythm, articulations, repeats, seed)
+	gen.lines += ['Synthetic tab', '=============', '',
+		      'Key: C', 'Time: 4/4', '']
+
+	number = 1
+	while len(gen.lines) < lines:
+		gen.section(number)
+		number += 1
+
+	return [ln + '\n' for ln in gen.lines]
+
+if __name__ == '__main__':
+	ap = argparse.ArgumentParser(description='Generate synthetic vtab.')
+	ap.add_argument('--lines', type=int, default=10000)
+	ap.add_argument('--density', type=float, default=0.3)
+	ap.add_argument('--rhythm', choices=RHYTHMS, default='simple')
+	ap.add_argument('--articulations', type=float, default=0.0)
+	ap.add_argument('--repeats', type=float, default=0.0)
+	ap.add_argument('--seed', type=int, default=0)
+	args = ap.parse_args()
+
+	sys.stdout.writelines(generate(args.lines, args.density, args.rhythm,
+			args.articulations, args.repeats, args.seed))
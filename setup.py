@@ -29,6 +29,7 @@ distutils.core.setup(name='vtab-utils',
       url='http://redfelineninja.org.uk/daniel/',
       license='GPLv3+',
       packages=['vtab'],
-      scripts=['vtab2ascii', 'vtab2dummy', 'vtab2ly', 'vtab2pdf', 'vtab2svg'],
+      scripts=['vtab2ascii', 'vtab2corpus', 'vtab2dummy', 'vtab2ly',
+               'vtab2pdf', 'vtab2svg'],
       cmdclass={'test': test}
      )
@@ -0,0 +1,70 @@
+"""Fixtures shared by the test cases.
+
+This is not a test module itself (so it is not picked up by test
+discovery) but it sits alongside the tests, which import it directly.
+
+"""
+import glob
+import io
+import os
+import shutil
+import tempfile
+
+import vtab
+
+TOPDIR = os.path.join(os.path.dirname(__file__), '..')
+
+EXAMPLES = sorted(glob.glob(os.path.join(TOPDIR, 'examples', '*.vtab')))
+
+class ExamplesMixin(object):
+	""" TestCase classes that use the example tabs should inherit
+	from this class (before unittest.TestCase).
+
+	self.examples is a (sorted) list of every example, which a test
+	case is free to modify.
+	"""
+	def setUp(self):
+		super(ExamplesMixin, self).setUp()
+		self.examples = list(EXAMPLES)
+
+class TempDirMixin(object):
+	""" TestCase classes that need somewhere to write files should
+	inherit from this class (before unittest.TestCase).
+
+	self.tmpdir is a new, empty directory that is removed (together
+	with everything in it) after each test.
+	"""
+	def setUp(self):
+		super(TempDirMixin, self).setUp()
+		self.tmpdir = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tmpdir)
+		super(TempDirMixin, self).tearDown()
+
+class FormattersMixin(object):
+	""" TestCase classes that compare the output of every formatter
+	should inherit from this class (before unittest.TestCase).
+	"""
+	def makeFormatters(self):
+		'''Return one of each formatter, each writing to a StringIO.'''
+		formatters = (vtab.AsciiFormatter(),
+			      vtab.DummyFormatter(),
+			      vtab.LilypondFormatter())
+		for fmt in formatters:
+			fmt.set_file(io.StringIO())
+		return formatters
+
+	def output(self, formatters):
+		return [fmt.f.getvalue() for fmt in formatters]
+
+	def parse(self, fname):
+		'''Parse fname, which must parse cleanly, returning the output
+		of each of makeFormatters().'''
+		formatters = self.makeFormatters()
+		p = vtab.VtabParser()
+		for fmt in formatters:
+			p.add_formatter(fmt)
+		with open(fname) as f:
+			self.assertEqual(0, p.parse_file(f))
+		return self.output(formatters)
@@ -1,3 +1,4 @@
+import io
 import re
 import unittest
 import sys
@@ -74,7 +75,7 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectNoOutput() # No output until flush
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|$')
+			self.expectRegex('^\\|$')
 		self.expectRegex('^# %s$' % (comment))
 		self.expectRegex('^$')
 
@@ -95,7 +96,7 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectNoOutput()
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|$')
+			self.expectRegex('^\\|$')
 		self.expectRegex('^$')
 
 	def testFormatBarlineAtEndOfLine(self):
@@ -104,7 +105,7 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectNoOutput()
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^-0-|$')
+			self.expectRegex('^-0-\\|$')
 		self.expectRegex('^$')
 
 	def testFormatBarlineEarlyWrap(self):
@@ -113,11 +114,11 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectNoOutput()
 		self.formatter.format_barline('unused')
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|' + ('-|' * 31) + '$')
+			self.expectRegex('^\\|' + ('-\\|' * 32) + '$')
 		self.expectRegex('^$')
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|$')
+			self.expectRegex('^\\|$')
 		self.expectRegex('^$')
 
 	def testFormatBarlineLastCharacterWrap(self):
@@ -127,11 +128,11 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectNoOutput()
 		self.formatter.format_barline('unused')
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|' + ('-0' * 38) + '-|$')
+			self.expectRegex('^\\|' + ('-0' * 38) + '-\\|$')
 		self.expectRegex('^$')
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|$')
+			self.expectRegex('^\\|$')
 		self.expectRegex('^$')
 
 	def testFormatBarlineLateWrap(self):
@@ -144,7 +145,7 @@ class AsciiFormatterTest(unittest.TestCase):
 		self.expectRegex('^$')
 		self.formatter.flush()
 		for dummy in tunings.STANDARD_TUNING:
-			self.expectRegex('^|$')
+			self.expectRegex('^\\|$')
 		self.expectRegex('^$')
 
 	def testFormatNoteWithUnfrettedStrum(self):
@@ -210,6 +211,71 @@ class AsciiFormatterTest(unittest.TestCase):
 			self.expectRegex('^-0$')
 		self.expectRegex('^$')
 
+	def testStreamingFlushesEachSystem(self):
+		self.formatter = AsciiFormatter(streaming=True)
+		self.formatter.set_file(self.writer)
+		self.format_note(tunings.STANDARD_TUNING)
+		self.expectNoOutput()
+		self.formatter.flush()
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^-0$')
+		self.expectRegex('^$')
+		self.assertEqual(self.writer.history[self.history_counter], ('flush',))
+		self.history_counter += 1
+
+	def testUnlimitedLineLength(self):
+		self.formatter = AsciiFormatter(line_length=None)
+		self.formatter.set_file(self.writer)
+		for dummy in range(50):
+			self.formatter.format_barline('unused')
+			for dummy in range(4):
+				self.format_note(tunings.STANDARD_TUNING)
+		self.expectNoOutput()
+		self.formatter.flush()
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^\\|' + ('-0-0-0-0-\\|' * 49) + '-0-0-0-0$')
+		self.expectRegex('^$')
+
+	def testShortLineLength(self):
+		self.formatter = AsciiFormatter(line_length=10)
+		self.formatter.set_file(self.writer)
+		for dummy in range(4):
+			self.format_note(tunings.STANDARD_TUNING)
+		self.expectNoOutput()
+		self.formatter.format_barline('unused')
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^' + ('-0' * 4) + '$')
+		self.expectRegex('^$')
+		self.formatter.flush()
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^\\|$')
+		self.expectRegex('^$')
+
+	def testShortLineLengthStartingWithBarline(self):
+		self.formatter = AsciiFormatter(line_length=10)
+		self.formatter.set_file(self.writer)
+		self.formatter.format_barline('unused')
+		self.format_note(tunings.STANDARD_TUNING)
+		self.formatter.format_barline('unused')
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^\\|-0-\\|$')
+		self.expectRegex('^$')
+		self.formatter.flush()
+		for dummy in tunings.STANDARD_TUNING:
+			self.expectRegex('^\\|$')
+		self.expectRegex('^$')
+
+	def testTinyLineLength(self):
+		for line_length in range(1, 19):
+			formatter = AsciiFormatter(line_length=line_length)
+			formatter.set_file(io.StringIO())
+			formatter.format_barline('unused')
+			formatter.format_note(tunings.STANDARD_TUNING,
+					      Fraction(1, 4), False)
+			formatter.format_barline('unused')
+			formatter.flush()
+			self.assertIn('0', formatter.f.getvalue())
+
 if __name__ == "__main__":
 	#import sys;sys.argv = ['', 'Test.testName']
 	unittest.main()
@@ -0,0 +1,80 @@
+import argparse
+import io
+import os
+import unittest
+
+import vtab
+import vtab.batch
+from helpers import TempDirMixin, ExamplesMixin
+
+class BatchTest(TempDirMixin, ExamplesMixin, unittest.TestCase):
+	def setUp(self):
+		super(BatchTest, self).setUp()
+		self.outdir = os.path.join(self.tmpdir, 'out')
+
+	def convertSerially(self, fname):
+		sio = io.StringIO()
+		fmt = vtab.AsciiFormatter()
+		fmt.set_file(sio)
+		p = vtab.VtabParser()
+		p.add_formatter(fmt)
+		with open(fname) as f:
+			p.parse_file(f)
+		return sio.getvalue()
+
+	def testConvertAll(self):
+		stderr = io.StringIO()
+		num_errors = vtab.batch.convert_all(self.examples, self.outdir,
+				vtab.AsciiFormatter, '.txt', jobs=2, stderr=stderr)
+		self.assertEqual(0, num_errors)
+		self.assertEqual('', stderr.getvalue())
+
+		for fname in self.examples:
+			outfname = vtab.batch.output_name(fname, self.outdir, '.txt')
+			with open(outfname) as f:
+				self.assertEqual(self.convertSerially(fname), f.read())
+
+	def testMissingFile(self):
+		missing = os.path.join(self.tmpdir, 'missing.vtab')
+		stderr = io.StringIO()
+		num_errors = vtab.batch.convert_all(
+				[missing] + self.examples[:1], self.outdir,
+				vtab.AsciiFormatter, '.txt', jobs=1, stderr=stderr)
+		self.assertEqual(1, num_errors)
+		self.assertTrue(stderr.getvalue().startswith(missing + ':'))
+		self.assertTrue(os.path.exists(vtab.batch.output_name(
+				self.examples[0], self.outdir, '.txt')))
+
+	def testUndecodableFile(self):
+		bad = os.path.join(self.tmpdir, 'bad.vtab')
+		with open(bad, 'wb') as f:
+			f.write(b'Title: \xff\xfe\n')
+		stderr = io.StringIO()
+		num_errors = vtab.batch.convert_all(
+				[bad] + self.examples[:1], self.outdir,
+				vtab.AsciiFormatter, '.txt', jobs=2, stderr=stderr)
+		self.assertEqual(1, num_errors)
+		self.assertTrue(stderr.getvalue().startswith(bad + ':'))
+		self.assertTrue(os.path.exists(vtab.batch.output_name(
+				self.examples[0], self.outdir, '.txt')))
+
+	def testOutputNameCollision(self):
+		fnames = [os.path.join(self.tmpdir, d, 'intro.vtab')
+				for d in ('a', 'b')]
+		self.assertRaises(ValueError, vtab.batch.convert_all, fnames,
+				self.outdir, vtab.AsciiFormatter, '.txt', jobs=1)
+		self.assertFalse(os.path.exists(self.outdir))
+
+	def testJobCount(self):
+		self.assertEqual(3, vtab.batch.job_count('3'))
+		for s in ('0', '-1', 'many'):
+			self.assertRaises(argparse.ArgumentTypeError,
+					vtab.batch.job_count, s)
+
+	def testExpandDirectory(self):
+		exampledir = os.path.dirname(self.examples[0])
+		self.assertEqual(self.examples, vtab.batch.expand([exampledir]))
+		self.assertEqual(['a.vtab'], vtab.batch.expand(['a.vtab']))
+
+if __name__ == "__main__":
+	unittest.main()
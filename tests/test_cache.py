@@ -0,0 +1,52 @@
+import os
+import time
+import unittest
+
+import vtab.cache
+from helpers import TempDirMixin
+
+class RenderCacheTest(TempDirMixin, unittest.TestCase):
+	def setUp(self):
+		super(RenderCacheTest, self).setUp()
+		self.cache = vtab.cache.RenderCache(
+				os.path.join(self.tmpdir, 'cache'), max_size=300)
+
+	def makeFile(self, name, size):
+		fname = os.path.join(self.tmpdir, name)
+		with open(fname, 'w') as f:
+			f.write(name[0] * size)
+		return fname
+
+	def testMakeKey(self):
+		self.assertEqual(vtab.cache.make_key('a', 'b'),
+				 vtab.cache.make_key(b'a', 'b'))
+		self.assertNotEqual(vtab.cache.make_key('ab', 'c'),
+				    vtab.cache.make_key('a', 'bc'))
+
+	def testStoreAndFetch(self):
+		out = os.path.join(self.tmpdir, 'out.pdf')
+		self.assertFalse(self.cache.fetch('key', '.pdf', out))
+		self.cache.store('key', '.pdf', self.makeFile('a.pdf', 10))
+		self.assertTrue(self.cache.fetch('key', '.pdf', out))
+		with open(out) as f:
+			self.assertEqual('a' * 10, f.read())
+
+	def testEviction(self):
+		out = os.path.join(self.tmpdir, 'out.pdf')
+		for (i, name) in enumerate(('a.pdf', 'b.pdf', 'c.pdf')):
+			self.cache.store(name[0], '.pdf', self.makeFile(name, 100))
+			# Force distinct (and increasing) timestamps
+			t = time.time() - 100 + i
+			os.utime(self.cache._path(name[0], '.pdf'), (t, t))
+
+		# Using 'a' makes 'b' the least recently used entry
+		self.assertTrue(self.cache.fetch('a', '.pdf', out))
+		self.cache.store('d', '.pdf', self.makeFile('d.pdf', 100))
+
+		self.assertTrue(self.cache.fetch('a', '.pdf', out))
+		self.assertFalse(self.cache.fetch('b', '.pdf', out))
+		self.assertTrue(self.cache.fetch('c', '.pdf', out))
+		self.assertTrue(self.cache.fetch('d', '.pdf', out))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,107 @@
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+import vtab
+import vtab.corpus
+from helpers import TOPDIR, TempDirMixin, ExamplesMixin
+
+class CorpusTest(TempDirMixin, ExamplesMixin, unittest.TestCase):
+	def setUp(self):
+		super(CorpusTest, self).setUp()
+		self.fname = os.path.join(self.tmpdir, 'library.vtc')
+
+	def parse(self, fname):
+		with open(fname) as f:
+			return vtab.VtabParser().parse_score(f)
+
+	def testRoundTrip(self):
+		scores = [(fname, self.parse(fname)) for fname in self.examples]
+		vtab.corpus.write(self.fname, scores)
+
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			self.assertEqual(len(scores), len(corpus))
+			self.assertEqual(self.examples, corpus.names)
+			self.assertEqual(scores, list(corpus))
+			for (entry, (fname, score)) in zip(corpus.entries, scores):
+				self.assertEqual(score.num_notes, entry.notes)
+				self.assertEqual(score.num_bars, entry.barlines)
+				self.assertEqual(0, entry.offset % 8)
+
+	def testFind(self):
+		vtab.corpus.write(self.fname,
+				[(fname, self.parse(fname)) for fname in self.examples])
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			i = corpus.find(self.examples[2])
+			self.assertEqual(2, i)
+			self.assertEqual(self.parse(self.examples[2]), corpus.score(i))
+			self.assertRaises(KeyError, corpus.find, 'missing.vtab')
+
+	def testRender(self):
+		fname = self.examples[0]
+		vtab.corpus.write(self.fname, [(fname, self.parse(fname))])
+
+		expected = vtab.AsciiFormatter()
+		expected.set_file(io.StringIO())
+		p = vtab.VtabParser()
+		p.add_formatter(expected)
+		with open(fname) as f:
+			p.parse_file(f)
+
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			fmt = vtab.AsciiFormatter()
+			fmt.set_file(io.StringIO())
+			corpus.score(0).render(fmt)
+		self.assertEqual(expected.f.getvalue(), fmt.f.getvalue())
+
+	def testEmpty(self):
+		vtab.corpus.write(self.fname, [])
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			self.assertEqual(0, len(corpus))
+			self.assertEqual([], list(corpus))
+
+	def testWriterError(self):
+		with self.assertRaises(RuntimeError):
+			with vtab.corpus.CorpusWriter(self.fname) as writer:
+				writer.add('a', self.parse(self.examples[0]))
+				raise RuntimeError()
+		self.assertFalse(os.path.exists(self.fname))
+
+	def testToolUnreadableFiles(self):
+		missing = os.path.join(self.tmpdir, 'missing.vtab')
+		bad = os.path.join(self.tmpdir, 'bad.vtab')
+		with open(bad, 'wb') as f:
+			f.write(b'Title: \xff\n')
+		proc = subprocess.run([sys.executable,
+				os.path.join(TOPDIR, 'vtab2corpus'),
+				'-o', self.fname, missing, bad, self.examples[0]],
+				stderr=subprocess.PIPE, universal_newlines=True,
+				env=dict(os.environ, PYTHONPATH=TOPDIR))
+		self.assertNotEqual(0, proc.returncode)
+		self.assertNotIn('Traceback', proc.stderr)
+		self.assertEqual([missing + ':', bad + ':'],
+				[ln.split()[0] for ln in proc.stderr.splitlines()])
+
+		# Everything else is still packed
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			self.assertEqual([self.examples[0]], corpus.names)
+
+	def testBadFile(self):
+		with open(self.fname, 'wb') as f:
+			f.write(b'This is not a corpus file at all')
+		self.assertRaises(ValueError, vtab.corpus.Corpus, self.fname)
+
+	def testTool(self):
+		subprocess.check_call([sys.executable,
+				os.path.join(TOPDIR, 'vtab2corpus'),
+				'-o', self.fname, os.path.join(TOPDIR, 'examples')],
+				env=dict(os.environ, PYTHONPATH=TOPDIR))
+		with vtab.corpus.Corpus(self.fname) as corpus:
+			self.assertEqual(len(self.examples), len(corpus))
+			for (fname, score) in corpus:
+				self.assertEqual(self.parse(fname), score)
+
+if __name__ == "__main__":
+	unittest.main()
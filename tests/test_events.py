@@ -0,0 +1,79 @@
+import os
+import shutil
+import unittest
+
+import vtab
+import vtab.events
+from vtab.cache import EventCache
+from helpers import TempDirMixin, ExamplesMixin, FormattersMixin
+
+class EventsTest(TempDirMixin, ExamplesMixin, FormattersMixin,
+		unittest.TestCase):
+	def setUp(self):
+		super(EventsTest, self).setUp()
+		self.cache = EventCache(os.path.join(self.tmpdir, 'cache'))
+
+	def parseCached(self, fname):
+		formatters = self.makeFormatters()
+		self.assertEqual(0, vtab.events.parse_cached(fname, formatters,
+				self.cache))
+		return self.output(formatters)
+
+	def testRoundTrip(self):
+		for fname in self.examples:
+			with open(fname) as f:
+				score = vtab.VtabParser().parse_score(f)
+
+			data = vtab.events.dumps(score)
+			self.assertEqual(score, vtab.events.loads(data))
+
+	def testBadData(self):
+		self.assertRaises(ValueError, vtab.events.loads, b'rubbish')
+
+	def testTruncatedData(self):
+		with open(self.examples[0]) as f:
+			score = vtab.VtabParser().parse_score(f)
+		data = vtab.events.dumps(score)
+		for length in (0, vtab.events.HEADER.size, len(data) - 1):
+			self.assertRaises(ValueError, vtab.events.loads, data[:length])
+
+	def testParseCachedDecodesBytesRead(self):
+		fname = os.path.join(self.tmpdir, 'latin1.vtab')
+		with open(fname, 'wb') as f:
+			f.write(b'Title: \xe9\n')
+		self.assertRaises(UnicodeDecodeError, vtab.events.parse_cached,
+				fname, self.makeFormatters(), self.cache)
+
+	def testParseCached(self):
+		expected = {}
+		for fname in self.examples:
+			expected[fname] = self.parse(fname)
+			self.assertEqual(expected[fname], self.parseCached(fname))
+
+		# Prove that cache hits do not parse anything
+		saved_parse = vtab.VtabParser.parse
+		def fail(*args):
+			self.fail('cached file was re-parsed')
+		vtab.VtabParser.parse = fail
+		try:
+			for fname in self.examples:
+				self.assertEqual(expected[fname], self.parseCached(fname))
+		finally:
+			vtab.VtabParser.parse = saved_parse
+
+	def testParseCachedUnusableCache(self):
+		self.cache = EventCache(os.path.join(os.devnull, 'cache'))
+		for i in range(2):
+			self.assertEqual(self.parse(self.examples[0]),
+					 self.parseCached(self.examples[0]))
+
+	def testParseCachedChangedFile(self):
+		fname = os.path.join(self.tmpdir, 'scale.vtab')
+		shutil.copy(self.examples[0], fname)
+		self.parseCached(fname)
+		with open(fname, 'a') as f:
+			f.write('| | | | | 0\n')
+		self.assertEqual(self.parse(fname), self.parseCached(fname))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,82 @@
+import io
+import unittest
+
+import vtab
+
+class RecordingFormatter(vtab.Formatter):
+	def __init__(self):
+		self.history = []
+		self.lookups = []
+
+	def handler(self, key):
+		self.lookups.append(key)
+		return vtab.Formatter.handler(self, key)
+
+	def format_comment(self, comment):
+		self.history.append(('comment', comment))
+
+	def format_barline(self, attributes):
+		self.history.append(('barline', attributes))
+
+	def format_note(self, notes, duration, tie):
+		self.history.append(('note', duration))
+
+	def unsupported_attribute(self, key, value):
+		self.history.append(('unsupported', key, value))
+
+	def flush(self):
+		pass
+
+class FormatterTest(unittest.TestCase):
+	def testFormatAttribute(self):
+		fmt = RecordingFormatter()
+		fmt.format_attribute('comment', 'Hello')
+		fmt.format_attribute('nonsense', 'World')
+		self.assertEqual([('comment', 'Hello'),
+				  ('unsupported', 'nonsense', 'World')], fmt.history)
+
+	def testDefaultUnsupportedAttribute(self):
+		vtab.Formatter().format_attribute('nonsense', 'Ignored')
+
+	def testParserCachesHandlers(self):
+		fmt = RecordingFormatter()
+		p = vtab.VtabParser()
+		p.add_formatter(fmt)
+		p.parse_file(io.StringIO('# One\n# Two\nFoo: Bar\n# Three\n'))
+
+		self.assertEqual(['comment', 'foo'], fmt.lookups)
+		self.assertEqual([('comment', 'One'), ('comment', 'Two'),
+				  ('unsupported', 'foo', 'Bar'),
+				  ('comment', 'Three')], fmt.history)
+
+	def testParserHonoursOverriddenFormatAttribute(self):
+		class ShoutingFormatter(RecordingFormatter):
+			def format_attribute(self, key, value):
+				RecordingFormatter.format_attribute(self, key,
+						value.upper())
+
+		fmt = ShoutingFormatter()
+		p = vtab.VtabParser()
+		p.add_formatter(fmt)
+		p.parse_file(io.StringIO('# One\nFoo: Bar\n'))
+		self.assertEqual([('comment', 'ONE'),
+				  ('unsupported', 'foo', 'BAR')], fmt.history)
+
+	def testParserDispatchFollowsFormatters(self):
+		(first, second) = (RecordingFormatter(), RecordingFormatter())
+		p = vtab.VtabParser()
+		p.add_formatter(first)
+		p.format_attribute('comment', 'One')
+		p.add_formatter(second)
+		p.format_attribute('comment', 'Two')
+		p.remove_formatter(first)
+		p.format_attribute('comment', 'Three')
+		p.format_barline({})
+
+		self.assertEqual([('comment', 'One'), ('comment', 'Two')],
+				first.history)
+		self.assertEqual([('comment', 'Two'), ('comment', 'Three'),
+				  ('barline', {})], second.history)
+
+if __name__ == "__main__":
+	unittest.main()
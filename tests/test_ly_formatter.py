@@ -1,9 +1,11 @@
+import io
 import re
 import sys
 import unittest
 from fractions import Fraction
+import vtab.note
 from vtab import tunings
-from vtab.ly_formatter import LilypondFormatter
+from vtab.ly_formatter import LilypondFormatter, score_id
 from vtab.note import Note
 
 class MockWriter(object):
@@ -335,6 +337,110 @@ class LilypondFormatterTest(unittest.TestCase):
 		self.assertTrue(self.skipToRegex(r))
 		self.expectRegex(r)
 
+	def testBookMode(self):
+		self.formatter = LilypondFormatter(book=True)
+		self.formatter.set_file(self.writer)
+
+		self.formatter.format_attribute('title', 'First')
+		self.format_note('X C3  X  X  X  X')
+		self.formatter.flush()
+		self.expectNoOutput()
+
+		self.formatter.format_attribute('title', 'Second')
+		self.formatter.format_attribute('key', 'A')
+		self.format_note('X  X  D3 X  X  X')
+		self.formatter.flush_book()
+
+		self.assertTrue(self.skipToRegex(r'^MelodyA = {$'))
+		self.assertTrue(self.skipToRegex(r'\\key c \\major'))
+		self.assertTrue(self.skipToRegex(r'^  <c\\5>4$'))
+		self.assertTrue(self.skipToRegex(r'^GuitarA =$'))
+		self.assertTrue(self.skipToRegex(r'^MelodyB = {$'))
+		self.assertTrue(self.skipToRegex(r'\\key a \\major'))
+		self.assertTrue(self.skipToRegex(r'^  <d\\4>4$'))
+		self.assertTrue(self.skipToRegex(r'^GuitarB =$'))
+		self.assertTrue(self.skipToRegex(r'^\\book {$'))
+		self.assertTrue(self.skipToRegex(r'title = "First"'))
+		self.assertTrue(self.skipToRegex(r'\\score { \\GuitarA }'))
+		self.assertTrue(self.skipToRegex(r'title = "Second"'))
+		self.assertTrue(self.skipToRegex(r'\\score { \\GuitarB }'))
+
+	def formatStreamingExample(self, formatter):
+		hammer = Note('D3')
+		hammer.add_articulation(vtab.note.HAMMER_ON)
+		formatter.set_file(io.StringIO())
+		formatter.format_attribute('comment', 'Intro')
+		formatter.format_attribute('title', 'Streaming')
+		formatter.format_barline({'repeat': 'open'})
+		formatter.format_note((None, Note('C3')) + (None,) * 4,
+				Fraction(1, 4), False)
+		formatter.format_note((None, Note('C3')) + (None,) * 4,
+				Fraction(1, 4), True)
+		partial = formatter.f.getvalue()
+		formatter.format_note((None, None, hammer) + (None,) * 3,
+				Fraction(3, 8), False)
+		formatter.format_attribute('comment', 'Outro')
+		formatter.format_note((None,) * 6, Fraction(1, 8), False)
+		formatter.format_barline({'double': 'right'})
+		formatter.flush()
+		return (partial, formatter.f.getvalue())
+
+	def testStreaming(self):
+		(unused, expected) = self.formatStreamingExample(LilypondFormatter())
+		(partial, output) = self.formatStreamingExample(
+				LilypondFormatter(streaming=True))
+		self.assertEqual(expected, output)
+
+		# Everything up to the pending note has already been written
+		self.assertTrue(expected.startswith(partial))
+		self.assertIn('title = "Streaming"', partial)
+		self.assertTrue(partial.endswith('<c\\5>4~'))
+
+	def testStreamingLateHeader(self):
+		self.formatter = LilypondFormatter(streaming=True)
+		self.formatter.set_file(self.writer)
+		self.format_note('X C3  X  X  X  X')
+		self.format_note('X C3  X  X  X  X')
+		self.formatter.format_attribute('key', 'A')
+		self.formatter.flush()
+
+		self.assertTrue(self.skipToRegex(r'\\key c \\major'))
+		self.assertTrue(self.skipToRegex(r'% ERROR: Cannot change key'))
+
+	def testStreamingStartsNewScore(self):
+		formatter = LilypondFormatter(streaming=True)
+		formatter.set_file(io.StringIO())
+		for title in ('First', 'Second'):
+			formatter.format_attribute('title', title)
+			formatter.format_note((None, Note('C3')) + (None,) * 4,
+					Fraction(1, 4), False)
+			formatter.flush()
+		output = formatter.f.getvalue()
+		self.assertEqual(2, output.count('\\version'))
+		self.assertEqual(2, output.count('<c\\5>4'))
+		self.assertIn('title = "Second"', output)
+
+	def testBufferedStartsNewScore(self):
+		formatter = LilypondFormatter()
+		formatter.set_file(io.StringIO())
+		for title in ('First', 'Second'):
+			formatter.format_attribute('title', title)
+			formatter.format_note((None, Note('C3')) + (None,) * 4,
+					Fraction(1, 4), False)
+			formatter.flush()
+		output = formatter.f.getvalue()
+		self.assertEqual(2, output.count('\\version'))
+		self.assertEqual(2, output.count('<c\\5>4'))
+		self.assertIn('title = "Second"', output)
+
+	def testStreamingBookMode(self):
+		self.assertRaises(ValueError, LilypondFormatter, book=True,
+				streaming=True)
+
+	def testScoreId(self):
+		self.assertEqual(['A', 'B', 'Z', 'AA', 'AZ', 'BA'],
+				 [score_id(n) for n in (0, 1, 25, 26, 51, 52)])
+
 
 if __name__ == "__main__":
 	#import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,66 @@
+import io
+import unittest
+
+import vtab
+import vtab.matrix
+from vtab.score import NO_NOTE
+from helpers import ExamplesMixin
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class MatrixTest(ExamplesMixin, unittest.TestCase):
+	def parse(self, s):
+		return vtab.VtabParser().parse_score(io.StringIO(s))
+
+	def testNoteMatrix(self):
+		m = vtab.matrix.note_matrix(self.parse(
+				'3 | | | | |  8\n' +
+				'| | | | | |\n' +
+				'-----------\n' +
+				'| | h2 | | |  2\n'))
+		ticks = vtab.matrix.TICKS_PER_WHOLE_NOTE
+
+		self.assertEqual(2, len(m))
+		self.assertEqual([ticks // 4, ticks // 2], list(m['duration']))
+		self.assertEqual([0, ticks // 4], list(m['onset']))
+		self.assertEqual([True, True], list(m['exact']))
+		self.assertEqual([0, 1], list(m['bar']))
+		self.assertEqual([3, NO_NOTE, NO_NOTE, NO_NOTE, NO_NOTE, NO_NOTE],
+				list(m['fret'][0]))
+		self.assertEqual([NO_NOTE, NO_NOTE, 2, NO_NOTE, NO_NOTE, NO_NOTE],
+				list(m['fret'][1]))
+		self.assertEqual(43, m['pitch'][0][0]) # G2
+		self.assertEqual(0, m['articulation'][0][0])
+		self.assertEqual(1, m['articulation'][1][2])
+
+	def testInexactDuration(self):
+		score = self.parse('| 3 | | | | |\n' + '| 3 | | | | | 11\n' * 11 +
+				'| 3 | | | | | 4\n')
+		m = vtab.matrix.note_matrix(score)
+		ticks = vtab.matrix.TICKS_PER_WHOLE_NOTE
+		self.assertEqual([True] + [False] * 11 + [True], list(m['exact']))
+		self.assertEqual(ticks, sum(m['duration'][1:12]))
+		self.assertTrue(all(abs(m['duration'][1:12] - ticks / 11) < 1))
+		# Rounding errors do not accumulate
+		self.assertEqual(ticks // 4 + ticks, m['onset'][-1])
+		self.assertEqual(ticks // 4, m['duration'][-1])
+
+	def testEmpty(self):
+		m = vtab.matrix.note_matrix(self.parse(''))
+		self.assertEqual(0, len(m))
+		self.assertEqual(0, len(vtab.matrix.load([])))
+
+	def testLoad(self):
+		m = vtab.matrix.load(self.examples)
+		self.assertEqual(set(range(len(self.examples))), set(m['file']))
+		for (i, fname) in enumerate(self.examples):
+			with open(fname) as f:
+				score = vtab.VtabParser().parse_score(f)
+			self.assertEqual(score.num_notes, numpy.sum(m['file'] == i))
+
+if __name__ == "__main__":
+	unittest.main()
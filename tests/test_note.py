@@ -1,5 +1,6 @@
 import unittest
-from vtab.note import Note
+import vtab.note
+from vtab.note import Note, shared
 
 class NoteTest(unittest.TestCase):
 	NOTES_WITH_SHARPS = ( 'C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B' )
@@ -95,6 +96,57 @@ class NoteTest(unittest.TestCase):
 		self.assertLess(localnote, self.note)
 		self.assertFalse(self.note < localnote)
 
+	def testNoInstanceDict(self):
+		self.assertFalse(hasattr(self.note, '__dict__'))
+
+	def testArticulation(self):
+		self.assertFalse(self.note.has_articulation(vtab.note.HAMMER_ON))
+		self.note.add_articulation(vtab.note.HAMMER_ON)
+		self.assertTrue(self.note.has_articulation(vtab.note.HAMMER_ON))
+		self.assertFalse(self.note.has_articulation(vtab.note.PULL_OFF))
+		self.note.remove_articulation(vtab.note.HAMMER_ON)
+		self.assertFalse(self.note.has_articulation(vtab.note.HAMMER_ON))
+
+	def testArticulationNotShared(self):
+		other = Note('C4')
+		self.note.add_articulation(vtab.note.PULL_OFF)
+		self.assertFalse(other.has_articulation(vtab.note.PULL_OFF))
+
+	def testArithmeticReturnsSharedNotes(self):
+		self.assertIs(self.note + 2, shared('D4'))
+		self.assertIs(self.note - 1, shared(59))
+		self.assertIs(shared(self.note), shared('C4'))
+
+	def testSharedNotesAreImmutable(self):
+		note = shared('C4')
+		self.assertRaises(TypeError, note.set, 'D4')
+		self.assertRaises(TypeError, note.add_articulation, vtab.note.HAMMER_ON)
+		self.assertEqual('C4', str(note))
+
+	def testConstructorReturnsPrivateNote(self):
+		self.assertIsNot(Note('C4'), Note('C4'))
+		self.assertIsNot(Note('C4'), shared('C4'))
+
+	def testOutsideMidiRange(self):
+		note = Note(128)
+		self.assertEqual('G#9', str(note))
+		self.assertEqual(('G', '#', 9), note.decompose())
+		self.assertEqual("gis''''''", note.to_lilypond())
+
+	def testDecompose(self):
+		self.assertEqual(('C', '', 4), self.note.decompose())
+		self.assertEqual(('A', '#', 2), Note('Bb2').decompose())
+
+	def testMalformedName(self):
+		self.assertRaises(ValueError, Note, 'H4')
+		self.assertRaises(ValueError, Note, 'c4')
+		self.assertRaises(ValueError, self.note.set, '')
+		self.assertEqual('C4', str(self.note))
+
+	def testTrailingCharacters(self):
+		self.note.set('Bb2 ')
+		self.assertEqual('A#2', str(self.note))
+
 if __name__ == "__main__":
 	#import sys;sys.argv = ['', 'Test.testName']
 	unittest.main()
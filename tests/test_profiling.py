@@ -0,0 +1,86 @@
+import io
+import unittest
+
+import vtab
+import vtab.profiling
+
+TAB = '''\
+Title
+=====
+
+Key: C
+  ===========
+  | 3 | | | |  8
+  | | 0 | | |
+  -----------
+  | | 2 | | |  text:"Quoted"
+  ===========
+'''
+
+class FakeClock(object):
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		# Every reading of the clock advances it by one second
+		self.now += 1.0
+		return self.now
+
+class ProfilerTest(unittest.TestCase):
+	def convert(self, profiler=None):
+		fmt = vtab.AsciiFormatter()
+		fmt.set_file(io.StringIO())
+		p = vtab.VtabParser()
+		p.add_formatter(fmt)
+		if profiler:
+			profiler.instrument(p)
+			self.assertEqual(0, profiler.run(p.parse_file, io.StringIO(TAB)))
+		else:
+			self.assertEqual(0, p.parse_file(io.StringIO(TAB)))
+		return fmt.f.getvalue()
+
+	def testOutputUnchanged(self):
+		self.assertEqual(self.convert(),
+				 self.convert(vtab.profiling.Profiler()))
+
+	def testEvents(self):
+		profiler = vtab.profiling.Profiler()
+		self.convert(profiler)
+		self.assertEqual({'attribute': 4, 'barline': 3, 'flush': 1,
+				  'line': 9, 'note': 3}, profiler.events)
+		self.assertEqual(3, profiler.calls['notes'])
+		self.assertEqual(6, profiler.calls['tokenize'])
+		self.assertGreater(profiler.calls['output'], 0)
+
+	def testSelfTime(self):
+		clock = FakeClock()
+		profiler = vtab.profiling.Profiler(clock)
+		inner = profiler.wrap(lambda: clock(), 'output')
+		def outer():
+			inner()
+			clock()
+		profiler.run(profiler.wrap(outer, 'format'))
+
+		# run() and the wrappers each read the clock on entry and exit
+		self.assertEqual(2.0, profiler.times['other'])
+		self.assertEqual(2.0, profiler.times['output'])
+		self.assertEqual(3.0, profiler.times['format'])
+		self.assertEqual(profiler.elapsed, sum(profiler.times.values()))
+
+	def testReport(self):
+		profiler = vtab.profiling.Profiler()
+		self.convert(profiler)
+		f = io.StringIO()
+		profiler.report(f)
+		report = f.getvalue()
+		for stage in vtab.profiling.STAGES:
+			self.assertIn('\n' + stage + ' ', report)
+		self.assertIn('3 note', report)
+
+	def testNotInstrumentedByDefault(self):
+		p = vtab.VtabParser()
+		self.assertNotIn('parse', vars(p))
+		self.assertNotIn('format_note', vars(p))
+
+if __name__ == "__main__":
+	unittest.main()
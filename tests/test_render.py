@@ -0,0 +1,229 @@
+import contextlib
+import io
+import os
+import shutil
+import stat
+import time
+import unittest
+
+import vtab
+import vtab.cache
+import vtab.render
+from helpers import TempDirMixin, ExamplesMixin
+
+# A stand-in for lilypond that copies its input into the output file
+FAKE_LILYPOND = '''#!/bin/sh
+backend=pdf
+while [ $# -gt 1 ]
+do
+	case "$1" in
+	-dbackend=*) backend=${1#-dbackend=} ;;
+	-o) shift; out="$1" ;;
+	esac
+	shift
+done
+cat > "$out.$backend"
+echo "$@" >> "$0.log"
+'''
+
+FAILING_LILYPOND = '''#!/bin/sh
+cat > /dev/null
+echo "fatal error: this is not lilypond"
+exit 1
+'''
+
+class RenderTest(TempDirMixin, ExamplesMixin, unittest.TestCase):
+	def setUp(self):
+		super(RenderTest, self).setUp()
+		# Work on copies (output is written alongside each file)
+		for (i, fname) in enumerate(self.examples):
+			shutil.copy(fname, self.tmpdir)
+			self.examples[i] = os.path.join(self.tmpdir,
+					os.path.basename(fname))
+
+	def makeProgram(self, name, script):
+		fname = os.path.join(self.tmpdir, name)
+		with open(fname, 'w') as f:
+			f.write(script)
+		os.chmod(fname, stat.S_IRWXU)
+		return fname
+
+	def testRenderAll(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		results = list(vtab.render.render_all(self.examples, 'pdf',
+				jobs=3, lilypond=lilypond))
+
+		self.assertEqual(self.examples, [r.fname for r in results])
+		for r in results:
+			self.assertTrue(r.ok, r.log)
+			self.assertEqual(r.fname[:-len('.vtab')] + '.pdf', r.output)
+			self.assertGreaterEqual(r.elapsed, 0)
+			with open(r.output) as f:
+				(source, num_errors, unused) = \
+					vtab.render.lilypond_source(r.fname)
+				self.assertEqual(source, f.read())
+
+	def testElapsedExcludesQueueing(self):
+		# With one job the later files wait for the earlier ones, which
+		# must not count towards their elapsed time
+		lilypond = self.makeProgram('lilypond',
+				FAKE_LILYPOND.replace('\n', '\nsleep 0.2\n', 1))
+		start = time.perf_counter()
+		results = list(vtab.render.render_all(self.examples[:3], 'pdf',
+				jobs=1, lilypond=lilypond))
+		total = time.perf_counter() - start
+		for r in results:
+			self.assertTrue(r.ok, r.log)
+			self.assertGreaterEqual(r.elapsed, 0.2)
+			self.assertGreaterEqual(r.parse_elapsed, 0)
+
+		# The jobs ran one after another so, however slow the machine,
+		# their times only add up to more than the total if they
+		# overlap (which they would if queueing was counted)
+		self.assertLessEqual(sum([r.elapsed for r in results]), total)
+
+	def testBadJobs(self):
+		stderr = io.StringIO()
+		with contextlib.redirect_stderr(stderr):
+			self.assertRaises(SystemExit, vtab.render.main, 'pdf',
+					['-j', '0', self.examples[0]])
+		self.assertIn("invalid number of jobs '0'", stderr.getvalue())
+
+	def testRenderSvgWithoutInkscape(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		r = vtab.render.render(self.examples[0], 'svg',
+				lilypond=lilypond, inkscape=None)
+		self.assertTrue(r.ok, r.log)
+		self.assertTrue(r.output.endswith('.svg'))
+		self.assertTrue(os.path.exists(r.output))
+
+	def testRenderFailure(self):
+		lilypond = self.makeProgram('lilypond', FAILING_LILYPOND)
+		results = list(vtab.render.render_all(self.examples[:2], 'pdf',
+				jobs=2, lilypond=lilypond))
+		for r in results:
+			self.assertFalse(r.ok)
+			self.assertIn('this is not lilypond', r.log)
+
+	def testRenderBook(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		book = os.path.join(self.tmpdir, 'songbook')
+		r = vtab.render.render_book(self.examples, book, lilypond=lilypond)
+		self.assertTrue(r.ok, r.log)
+		self.assertEqual(book + '.pdf', r.output)
+		self.assertEqual(1, self.countRuns(lilypond))
+		with open(r.output) as f:
+			source = f.read()
+		self.assertEqual(1, source.count('\\book {'))
+		self.assertEqual(len(self.examples), source.count('\\bookpart {'))
+
+	def testBookScoresAreIndependent(self):
+		# The first score changes the note length; the second must not
+		# inherit it
+		fnames = []
+		for (name, length) in (('a', '  8'), ('b', '')):
+			fname = os.path.join(self.tmpdir, name + '.vtab')
+			with open(fname, 'w') as f:
+				f.write('  | 3 | | | |%s\n  | | 0 | | |\n' % (length,))
+			fnames.append(fname)
+		(source, num_errors, unused) = vtab.render.book_source(fnames)
+		self.assertEqual(0, num_errors)
+		self.assertIn('<c\\5>8  <d\\4>8', source)
+		self.assertIn('<c\\5>4  <d\\4>4', source)
+
+	def countRuns(self, lilypond):
+		try:
+			with open(lilypond + '.log') as f:
+				return len(f.readlines())
+		except FileNotFoundError:
+			return 0
+
+	def testCache(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		cache = vtab.cache.RenderCache(os.path.join(self.tmpdir, 'cache'))
+
+		r = vtab.render.render(self.examples[0], lilypond=lilypond, cache=cache)
+		self.assertTrue(r.ok)
+		self.assertFalse(r.cached)
+		with open(r.output) as f:
+			expected = f.read()
+		os.unlink(r.output)
+
+		r = vtab.render.render(self.examples[0], lilypond=lilypond, cache=cache)
+		self.assertTrue(r.ok)
+		self.assertTrue(r.cached)
+		self.assertEqual(1, self.countRuns(lilypond))
+		with open(r.output) as f:
+			self.assertEqual(expected, f.read())
+
+		# Changing the backend options must miss the cache
+		r = vtab.render.render(self.examples[0], lilypond=lilypond,
+				options=('afive',), cache=cache)
+		self.assertFalse(r.cached)
+		self.assertEqual(2, self.countRuns(lilypond))
+
+		# ... as must changing the source
+		with open(self.examples[0], 'a') as f:
+			f.write('| | | | | 0\n')
+		r = vtab.render.render(self.examples[0], lilypond=lilypond, cache=cache)
+		self.assertFalse(r.cached)
+		self.assertEqual(3, self.countRuns(lilypond))
+
+	def testUnusableCache(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		stderr = io.StringIO()
+		with contextlib.redirect_stderr(stderr):
+			status = vtab.render.main('pdf', ['--lilypond', lilypond,
+					'--cache-dir', os.path.join(os.devnull, 'cache'),
+					self.examples[0]])
+		self.assertEqual(0, status, stderr.getvalue())
+		self.assertEqual(1, self.countRuns(lilypond))
+		self.assertIn('warning: cannot', stderr.getvalue())
+		self.assertTrue(os.path.exists(
+				vtab.render.output_base(self.examples[0]) + '.pdf'))
+
+	def testUndecodableFile(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		bad = os.path.join(self.tmpdir, 'bad.vtab')
+		with open(bad, 'wb') as f:
+			f.write(b'Title: \xff\n')
+		results = list(vtab.render.render_all([bad, self.examples[0]],
+				'pdf', jobs=1, lilypond=lilypond))
+		self.assertFalse(results[0].ok)
+		self.assertIn(bad + ': ', results[0].log)
+		self.assertTrue(results[1].ok)
+
+		(source, num_errors, diagnostics) = vtab.render.book_source(
+				[bad, self.examples[0]])
+		self.assertEqual(1, num_errors)
+		self.assertIn(bad + ': ', diagnostics)
+		self.assertEqual(1, source.count('\\bookpart {'))
+
+	def testCacheInkscape(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		inkscape = self.makeProgram('inkscape', '#!/bin/sh\n')
+		cache = vtab.cache.RenderCache(os.path.join(self.tmpdir, 'cache'))
+
+		r = vtab.render.render(self.examples[0], 'svg', lilypond=lilypond,
+				inkscape=None, cache=cache)
+		self.assertFalse(r.cached)
+
+		# Output that inkscape has not processed must not be reused
+		r = vtab.render.render(self.examples[0], 'svg', lilypond=lilypond,
+				inkscape=inkscape, cache=cache)
+		self.assertFalse(r.cached)
+		self.assertEqual(2, self.countRuns(lilypond))
+
+		r = vtab.render.render(self.examples[0], 'svg', lilypond=lilypond,
+				inkscape=inkscape, cache=cache)
+		self.assertTrue(r.cached)
+
+	def testMissingFile(self):
+		lilypond = self.makeProgram('lilypond', FAKE_LILYPOND)
+		missing = os.path.join(self.tmpdir, 'missing.vtab')
+		r = vtab.render.render(missing, lilypond=lilypond)
+		self.assertFalse(r.ok)
+		self.assertIn('No such file', r.log)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,71 @@
+import io
+import unittest
+from fractions import Fraction
+
+import vtab
+import vtab.score
+from vtab.note import Note
+from helpers import ExamplesMixin, FormattersMixin
+
+class ScoreTest(ExamplesMixin, FormattersMixin, unittest.TestCase):
+	def testBarlineEncoding(self):
+		for double in vtab.score.BARLINE_DOUBLE:
+			for repeat in vtab.score.BARLINE_REPEAT:
+				attributes = {}
+				if double:
+					attributes['double'] = double
+				if repeat:
+					attributes['repeat'] = repeat
+				code = vtab.score.encode_barline(attributes)
+				self.assertEqual(attributes,
+						vtab.score.decode_barline(code))
+
+	def testNotes(self):
+		hammer = Note('A2')
+		hammer.add_articulation(vtab.note.HAMMER_ON)
+		both = Note('C4')
+		both.add_articulation(vtab.note.HAMMER_ON)
+		both.add_articulation(vtab.note.PULL_OFF)
+		notes = (None, hammer, Note('D3'), both, None, Note(-3))
+
+		score = vtab.score.Score()
+		score.format_attribute('title', 'Test')
+		score.format_note(notes, Fraction(1, 3), False)
+		score.format_barline({'double': 'right'})
+		score.format_note((None,) * 6, Fraction(3, 8), True)
+
+		self.assertEqual(4, len(score))
+		self.assertEqual(2, score.num_notes)
+		self.assertEqual(1, score.num_bars)
+		self.assertEqual(notes, score.note(0))
+		self.assertEqual([n.articulation for n in notes if n],
+				[n.articulation for n in score.note(0) if n])
+		self.assertEqual(Fraction(1, 3), score.duration(0))
+		self.assertEqual(Fraction(3, 8), score.duration(1))
+		self.assertEqual([0, 1], list(score.bars))
+		self.assertEqual([0, 1], list(score.ties))
+
+	def testRender(self):
+		for fname in self.examples:
+			expected = self.parse(fname)
+
+			with open(fname) as f:
+				score = vtab.VtabParser().parse_score(f)
+			formatters = self.makeFormatters()
+			score.render(*formatters)
+			self.assertEqual(expected, self.output(formatters))
+
+	def testRenderTwice(self):
+		with open(self.examples[0]) as f:
+			score = vtab.VtabParser().parse_score(f)
+		output = []
+		for i in range(2):
+			fmt = vtab.AsciiFormatter()
+			fmt.set_file(io.StringIO())
+			score.render(fmt)
+			output.append(fmt.f.getvalue())
+		self.assertEqual(output[0], output[1])
+		self.assertNotEqual('', output[0])
+
+if __name__ == "__main__":
+	unittest.main()
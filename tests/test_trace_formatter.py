@@ -0,0 +1,65 @@
+import io
+import json
+import unittest
+from fractions import Fraction
+
+import vtab
+from vtab.note import Note
+from helpers import ExamplesMixin
+
+class TraceFormatterTest(ExamplesMixin, unittest.TestCase):
+	def trace(self, fname, formatter):
+		formatter.set_file(io.StringIO())
+		p = vtab.VtabParser()
+		p.add_formatter(formatter)
+		p.parse_path(fname)
+		return formatter.f.getvalue()
+
+	def testMatchesDummyFormatter(self):
+		for fname in self.examples:
+			self.assertEqual(self.trace(fname, vtab.DummyFormatter()),
+					 self.trace(fname, vtab.TraceFormatter()))
+
+	def testJsonLines(self):
+		for fname in self.examples:
+			text = self.trace(fname, vtab.TraceFormatter()).splitlines()
+			lines = self.trace(fname,
+					vtab.TraceFormatter(json_lines=True)).splitlines()
+			self.assertEqual(len(text), len(lines))
+			for (t, ln) in zip(text, lines):
+				event = json.loads(ln)
+				self.assertTrue(t.startswith(event['event'] + '('))
+			self.assertEqual({'event': 'flush', 'args': []},
+					 json.loads(lines[-1]))
+
+	def testJsonEncoding(self):
+		fmt = vtab.TraceFormatter(json_lines=True)
+		fmt.set_file(io.StringIO())
+		hammer = Note('D3')
+		hammer.add_articulation(vtab.note.HAMMER_ON)
+		fmt.format_note((None, Note('C3'), hammer), Fraction(3, 8), True)
+		fmt.flush()
+		self.assertEqual({'event': 'format_note', 'args': [
+				[None, 'C3', {'note': 'D3',
+					      'articulation': ['hammer-on']}],
+				'3/8', True]},
+				json.loads(fmt.f.getvalue().splitlines()[0]))
+
+	def testBuffering(self):
+		fmt = vtab.TraceFormatter()
+		fmt.set_file(io.StringIO())
+		fmt.format_barline({})
+		self.assertEqual('', fmt.f.getvalue())
+		for i in range(fmt.BUFFER_SIZE - 1):
+			fmt.format_barline({})
+		self.assertEqual(fmt.BUFFER_SIZE, len(fmt.f.getvalue().splitlines()))
+		fmt.flush()
+		self.assertEqual('flush()', fmt.f.getvalue().splitlines()[-1])
+
+	def testMethodsAreCached(self):
+		fmt = vtab.TraceFormatter()
+		self.assertIs(fmt.format_note, fmt.format_note)
+		self.assertRaises(AttributeError, getattr, fmt, '__missing__')
+
+if __name__ == "__main__":
+	unittest.main()
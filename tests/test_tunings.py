@@ -31,6 +31,11 @@ class ChordTest(unittest.TestCase):
 		actual = chord((None,None,0,2,3,2))
 		self.assertTupleEqual(expected, actual)
 
+	def testChordNotesAreShared(self):
+		actual = chord((0,None,0,None,0,0))
+		self.assertIs(STANDARD_TUNING[0], actual[0])
+		self.assertIs(STANDARD_TUNING[5], actual[5])
+
 if __name__ == "__main__":
 	#import sys;sys.argv = ['', 'Test.testName']
 	unittest.main()
\ No newline at end of file
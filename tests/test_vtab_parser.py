@@ -1,4 +1,7 @@
 import io
+import os
+import shlex
+import tempfile
 import unittest
 from fractions import Fraction
 
@@ -15,6 +18,7 @@ class MockFormatter(object):
 				self.history.append((name,) + args)
 			else:
 				self.history.append((name,) + args + (kwargs,))
+		setattr(self, name, mock)
 		return mock
 
 class VtabParserTest(unittest.TestCase):
@@ -365,6 +369,28 @@ class VtabParserTest(unittest.TestCase):
 		self.expectHistory(('format_attribute', 'duration', Fraction(1,64)))
 		self.expectNote(' X C3  X  X  X  X', Fraction(1,8))
 
+	def testNoteDurationTriplet(self):
+		self.parse("""
+		 | 3 | | | |  12
+		 | 3 | | | |
+		 | | | | | |
+		""")
+
+		self.expectHistory(('format_attribute', 'duration', Fraction(1,12)))
+		self.expectNote(' X C3  X  X  X  X', Fraction(1,12))
+		self.expectNote(' X C3  X  X  X  X', Fraction(1,6))
+
+	def testNoteDurationInexactTicks(self):
+		self.parse("""
+		 | 3 | | | |  11
+		 | 3 | | | |  4
+		""")
+
+		self.expectHistory(('format_attribute', 'duration', Fraction(1,11)))
+		self.expectNote(' X C3  X  X  X  X', Fraction(1,11))
+		self.expectHistory(('format_attribute', 'duration', Fraction(1,4)))
+		self.expectNote(' X C3  X  X  X  X', Fraction(1,4))
+
 	def testNotesAndRests(self):
 		self.parse("""
 			| | | 2 1 1  16
@@ -526,6 +552,103 @@ class VtabParserTest(unittest.TestCase):
 		self.expectBarline('-')
 
 
+	def testClassifierMatchesRecognisers(self):
+		def classify(s):
+			for (kind, regex) in (('barline', self.parser.RE_BARLINE),
+					      ('comment', self.parser.RE_COMMENT),
+					      ('keypair', self.parser.RE_KEYPAIR),
+					      ('note', self.parser.RE_NOTE)):
+				if regex.match(s):
+					return kind
+			return None
+
+		for ln in ('  ===========', ':------:', '-------- 8 "Some-"',
+			   '# comment', '  ## comment', 'Key: C', 'title:x',
+			   ' | 3 | | | |  8', '12 14 14 13  12 12', ' | h2 | | |',
+			   '3 : 0 0 0 3', '---', 'This is gibber', '', '\t'):
+			m = self.parser.RE_CLASSIFY.match(ln)
+			self.assertEqual(classify(ln), m.lastgroup if m else None, ln)
+
+	def testTokenizeMatchesShlex(self):
+		for ln in (' | 3 | | | |  8',
+			   '12 14 14 13  12 12',
+			   '\t| h2  |  |  |  |',
+			   ' | | | : : :',
+			   '-------- 8 "Some-"',
+			   " 0 | | | | |  text:'Em'",
+			   ' 1 | | | | |  text:"Different quoting"',
+			   ' 1 | | | | |  Caf\u00e9\u00a0au\\ lait',
+			   '',
+			   '   '):
+			self.assertEqual(shlex.split(ln), self.parser._tokenize(ln))
+
+	def testParseFileIsLazy(self):
+		progress = []
+		test = self
+
+		class LazyFile(object):
+			name = '<lazy>'
+			def __iter__(self):
+				for ln in ('| | 0 | | |  4', '--------', '| | 2 | | |'):
+					progress.append(len(test.formatter.history))
+					yield ln + '\n'
+
+		self.assertEqual(0, self.parser.parse_file(LazyFile()))
+
+		# The first note must reach the formatters before the
+		# last line has been read.
+		self.assertGreater(progress[-1], 0)
+
+		self.expectHistory(('format_attribute', 'duration', Fraction(1,4)))
+		self.expectNote(' X  X D3  X  X  X')
+		self.expectBarline('-')
+		self.expectNote(' X  X E3  X  X  X')
+		self.expectHistory(('flush',))
+
+	def testBlankLinesEndUnparseableLine(self):
+		self.assertEqual(0, self.parser.parse_file(
+				io.StringIO('Not vtab\n\n \t\n| | 0 | | |\n')))
+		self.expectHistory(('format_attribute', 'error',
+				"Cannot parse 'Not vtab' at line 1"))
+		self.expectNote(' X  X D3  X  X  X')
+		self.expectHistory(('flush',))
+
+	def testParsePath(self):
+		text = 'Caf\u00e9\n=====\n\n| | 0 | | |  T:\u00e9t\u00e9\n\n'
+		with tempfile.NamedTemporaryFile('w', encoding='UTF-8',
+				suffix='.vtab', delete=False) as f:
+			f.write(text)
+		try:
+			self.assertEqual(0, self.parser.parse_path(f.name))
+		finally:
+			os.unlink(f.name)
+
+		expected = MockFormatter()
+		p = vtab.VtabParser()
+		p.add_formatter(expected)
+		p.parse_file(io.StringIO(text))
+		self.assertEqual(4, len(expected.history))
+		for event in expected.history:
+			self.expectHistory(event)
+
+	def testHammerOnArticulation(self):
+		self.parse('''
+		 |  0  |  |  |  |  4
+		 | h2  |  |  |  |
+		 | p0  |  |  |  |
+		''')
+
+		self.expectHistory(('format_attribute', 'duration', Fraction(1,4)))
+		notes = [h[1][1] for h in self.formatter.history[1:]]
+		self.assertFalse(notes[0].has_articulation(vtab.note.HAMMER_ON))
+		self.assertTrue(notes[1].has_articulation(vtab.note.HAMMER_ON))
+		self.assertTrue(notes[2].has_articulation(vtab.note.PULL_OFF))
+		self.assertFalse(notes[2].has_articulation(vtab.note.HAMMER_ON))
+		self.expectNote(' X A2  X  X  X  X')
+		self.expectNote(' X B2  X  X  X  X')
+		self.expectNote(' X A2  X  X  X  X')
+
+
 if __name__ == "__main__":
 	#import sys;sys.argv = ['', 'Test.testName']
 	unittest.main()
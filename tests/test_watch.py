@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from vtab.watch import Watcher
+from helpers import TOPDIR, TempDirMixin
+
+class FakeClock(object):
+	def __init__(self):
+		self.now = 1000.0
+
+	def __call__(self):
+		return self.now
+
+class WatcherTest(TempDirMixin, unittest.TestCase):
+	def setUp(self):
+		super(WatcherTest, self).setUp()
+		self.clock = FakeClock()
+		self.mtime = 1000000000
+		self.a = self.write('a.vtab', '| | 0 | | |\n')
+		self.b = self.write('b.vtab', '| | 2 | | |\n')
+		self.watcher = Watcher((self.a, self.b), debounce=1.0, clock=self.clock)
+
+	def write(self, name, content):
+		fname = os.path.join(self.tmpdir, name)
+		with open(fname, 'w') as f:
+			f.write(content)
+
+		# Explicitly advance the timestamp (filesystem timestamps can be
+		# too coarse to observe rapid changes)
+		self.mtime += 1
+		os.utime(fname, (self.mtime, self.mtime))
+		return fname
+
+	def advance(self, seconds):
+		self.clock.now += seconds
+
+	def testNoChange(self):
+		self.assertEqual([], self.watcher.poll())
+		self.advance(5)
+		self.assertEqual([], self.watcher.poll())
+
+	def testChangeIsDebounced(self):
+		self.write('a.vtab', '| | 3 | | |\n')
+		self.assertEqual([], self.watcher.poll())
+		self.advance(0.5)
+		self.write('a.vtab', '| | 5 | | |\n')
+		self.assertEqual([], self.watcher.poll())
+		self.advance(0.5)
+		self.assertEqual([], self.watcher.poll())
+		self.advance(0.5)
+		self.assertEqual([self.a], self.watcher.poll())
+		self.advance(5)
+		self.assertEqual([], self.watcher.poll())
+
+	def testTouchWithoutChange(self):
+		self.write('b.vtab', '| | 2 | | |\n')
+		self.assertEqual([], self.watcher.poll())
+		self.advance(5)
+		self.assertEqual([], self.watcher.poll())
+
+	def testDeleteAndRecreate(self):
+		os.unlink(self.b)
+		self.assertEqual([], self.watcher.poll())
+		self.advance(5)
+		self.assertEqual([], self.watcher.poll())
+		self.write('b.vtab', '| | 2 | | |\n')
+		self.assertEqual([], self.watcher.poll())
+		self.advance(5)
+		self.assertEqual([self.b], self.watcher.poll())
+
+	def testConvertSurvivesUnreadableFiles(self):
+		# The --watch callback of vtab2ascii and vtab2ly must report
+		# files that vanish, or cannot be decoded, and carry on
+		missing = os.path.join(self.tmpdir, 'missing.vtab')
+		bad = os.path.join(self.tmpdir, 'bad.vtab')
+		with open(bad, 'wb') as f:
+			f.write(b'Title: \xff\n')
+		for tool in ('vtab2ascii', 'vtab2ly'):
+			proc = subprocess.run([sys.executable,
+					os.path.join(TOPDIR, tool), missing, bad, self.a],
+					stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+					universal_newlines=True,
+					env=dict(os.environ, PYTHONPATH=TOPDIR))
+			self.assertNotIn('Traceback', proc.stderr)
+			self.assertTrue(proc.stderr.startswith(missing + ':'))
+			self.assertIn(bad + ':', proc.stderr)
+			self.assertNotEqual('', proc.stdout)
+
+if __name__ == "__main__":
+	unittest.main()
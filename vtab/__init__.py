@@ -1,13 +1,26 @@
 from .ascii_formatter import AsciiFormatter
 from .dummy_formatter import DummyFormatter
+from .formatter import Formatter
 from .ly_formatter import LilypondFormatter
 from .note import Note
+from .trace_formatter import TraceFormatter
 from .vtab_parser import VtabParser
 
 __all__ = [
 	'ascii_formatter',
+	'batch',
+	'cache',
+	'corpus',
 	'dummy_formatter',
+	'events',
+	'formatter',
 	'ly_formatter',
+	'matrix',
 	'note',
-	'vtab_parser'
+	'profiling',
+	'render',
+	'score',
+	'trace_formatter',
+	'vtab_parser',
+	'watch'
 ]
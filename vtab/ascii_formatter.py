@@ -1,13 +1,22 @@
 import re, unittest, sys
 from fractions import Fraction
 from vtab import tunings
+from vtab.formatter import Formatter
 
-class AsciiFormatter(object):
+class AsciiFormatter(Formatter):
 	LINE_LENGTH = 80
 
-	def __init__(self):
+	def __init__(self, streaming=False, line_length=LINE_LENGTH):
+		'''Create a new formatter.
+
+		line_length is the maximum width of each system. If it is None
+		then the lines are never wrapped.
+		'''
 		self.f = sys.stdout
+		self._streaming = streaming
+		self._line_length = line_length
 		self._staff_lines = ()
+		self._width = 0 # Current width of the staff lines
 		self._comments = []
 		self._duration = Fraction(1, 4)
 		self._pad = False
@@ -26,16 +35,9 @@ class AsciiFormatter(object):
 			staff_lines.append([])
 		self._staff_lines = tuple(staff_lines)
 
-	def format_attribute(self, key, value):
-		try:
-			fn = getattr(self, 'format_' + key)
-		except:
-			fn = None
-		if None != fn:
-			fn(value)
-		else:
-			self.flush()
-			self.f.write("ERROR: Unsupported attribute (%s: '%s')\n" % (key, value))
+	def unsupported_attribute(self, key, value):
+		self.flush()
+		self.f.write("ERROR: Unsupported attribute (%s: '%s')\n" % (key, value))
 
 	def format_comment(self, comment):
 		comment = '# %s\n' % (comment)
@@ -70,18 +72,25 @@ class AsciiFormatter(object):
 		self._pad = True
 
 	def format_barline(self, unused):
-		width = len(''.join(self._staff_lines[0])) + 2
-		if width >= self.LINE_LENGTH:
+		width = self._width + 2
+		if self._line_length is not None and width >= self._line_length:
 			self.flush()
 			width = 0
 
+		empty = len(self._staff_lines[0]) == 0
+		if empty:
+			bar = '|'
+		else:
+			bar = '-|'
 		for s in self._staff_lines:
-			if len(s) == 0:
-				s.append('|')
-			else:
-				s.append('-|')
-
-		if width >= self.LINE_LENGTH - 16:
+			s.append(bar)
+		self._width += len(bar)
+
+		# Avoid starting a new bar close to the end of the line. The
+		# barline is repeated at the start of the next line (so this
+		# must never happen if the line was empty to begin with).
+		if self._line_length is not None and not empty and \
+				width >= self._line_length - 16:
 			self.flush()
 			self.format_barline(unused)
 
@@ -94,18 +103,20 @@ class AsciiFormatter(object):
 				fret = int(note - tuning)
 				frets.append(str(fret))
 
-		post_padding = max(int(duration / self._duration) - 1, 0)
+		# Equivalent to int(duration / self._duration) but avoids the
+		# construction (and normalization) of an intermediate Fraction
+		post_padding = max((duration.numerator * self._duration.denominator) //
+				(duration.denominator * self._duration.numerator) - 1, 0)
 		width = max([ len(fret) for fret in frets ]) + post_padding + 1
 
-		if len(''.join(self._staff_lines[0])) + width >= self.LINE_LENGTH:
+		if self._line_length is not None and \
+				self._width + width >= self._line_length:
 			self.flush()
 
 		for line, fret in zip(self._staff_lines, frets):
 			pre_padding = width - len(fret) - post_padding
 			line.append(('-' * pre_padding) + fret + '-' * post_padding)
-
-
-
+		self._width += width
 
 	def flush(self):
 		if self._pad:
@@ -123,9 +134,17 @@ class AsciiFormatter(object):
 				# Check that all staff lines are the same length
 				assert(lastline == None or len(line) == len(lastline))
 				lastline = line
+			assert(len(lastline) == self._width + 1)
+			self._width = 0
 			issue_seperator = True
 		for c in self._comments:
 			self.f.write(c)
 		del self._comments[:]
 		if issue_seperator:
 			self.f.write('\n')
+
+			# In streaming mode each system is pushed to the output
+			# as soon as it is complete (rather than waiting for the
+			# output buffer to fill).
+			if self._streaming:
+				self.f.flush()
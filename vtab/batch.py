@@ -0,0 +1,116 @@
+'''Convert many vtab files, in parallel, into an output directory.
+
+Every file is converted using its own parser and formatter (created by
+calling the supplied formatter factory) so files can be processed in
+separate worker processes. The factory must therefore be picklable; a
+formatter class or a functools.partial() wrapping one are both fine.
+'''
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import io
+import itertools
+import os
+import sys
+
+from .vtab_parser import VtabParser
+
+def expand(paths):
+	'''Expand any directories in paths into the .vtab files they contain.'''
+	fnames = []
+	for path in paths:
+		if os.path.isdir(path):
+			fnames += sorted(glob.glob(os.path.join(path, '*.vtab')))
+		else:
+			fnames.append(path)
+	return fnames
+
+def job_count(s):
+	'''argparse type for a --jobs option (which must be at least 1).'''
+	try:
+		n = int(s)
+	except ValueError:
+		n = 0
+	if n < 1:
+		raise argparse.ArgumentTypeError("invalid number of jobs '%s'" % s)
+	return n
+
+def output_name(fname, outdir, suffix):
+	base = os.path.splitext(os.path.basename(fname))[0]
+	return os.path.join(outdir, base + suffix)
+
+def output_names(fnames, outdir, suffix):
+	'''Return the output_name() of every file in fnames.
+
+	Raises ValueError if two files would be written to the same output
+	(for example a/intro.vtab and b/intro.vtab).
+	'''
+	outfnames = []
+	seen = {}
+	for fname in fnames:
+		outfname = output_name(fname, outdir, suffix)
+		if outfname in seen:
+			raise ValueError('%s and %s would both be converted to %s' %
+					(seen[outfname], fname, outfname))
+		seen[outfname] = fname
+		outfnames.append(outfname)
+	return outfnames
+
+def convert(fname, outfname, factory):
+	'''Convert a single file.
+
+	Returns a tuple containing the number of errors and any diagnostics
+	that were issued whilst converting the file.
+	'''
+	diagnostics = io.StringIO()
+	with contextlib.redirect_stderr(diagnostics):
+		try:
+			fmt = factory()
+			p = VtabParser()
+			p.add_formatter(fmt)
+			with open(fname) as f, open(outfname, 'w') as out:
+				fmt.set_file(out)
+				num_errors = p.parse_file(f)
+		except Exception as e:
+			# Anything (a missing file, undecodable input...) that
+			# stops this file being converted is reported against it
+			# rather than aborting the whole batch
+			print('%s: %s' % (fname, e), file=sys.stderr)
+			num_errors = 1
+
+	return (num_errors, diagnostics.getvalue())
+
+def _report(results, stderr):
+	total = 0
+	for (num_errors, diagnostics) in results:
+		stderr.write(diagnostics)
+		total += num_errors
+	return total
+
+def convert_all(fnames, outdir, factory, suffix, jobs=None, stderr=None):
+	'''Convert fnames, writing the results to outdir.
+
+	Up to jobs files are converted at once (by default one per CPU).
+	Diagnostics are copied to stderr one file at a time, in the same
+	order as fnames, so that messages from different files are never
+	interleaved.
+
+	Returns the total number of errors. Raises ValueError, before
+	converting anything, if two files would have the same output (see
+	output_names()).
+	'''
+	if stderr is None:
+		stderr = sys.stderr
+
+	outfnames = output_names(fnames, outdir, suffix)
+	os.makedirs(outdir, exist_ok=True)
+	factories = itertools.repeat(factory)
+
+	if jobs == 1:
+		return _report(map(convert, fnames, outfnames, factories), stderr)
+
+	with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+		return _report(executor.map(convert, fnames, outfnames, factories),
+				stderr)
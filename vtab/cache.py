@@ -0,0 +1,131 @@
+'''On-disk, content-addressed caches.
+
+Cache entries are named after a hash of everything that influences their
+content, so an entry never needs to be invalidated; unused entries are
+simply evicted (least recently used first) once the cache grows beyond
+its size limit.
+'''
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+def default_directory(name):
+	'''Return the default location of the cache called name.'''
+	base = os.environ.get('XDG_CACHE_HOME')
+	if not base:
+		base = os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(base, 'vtab-utils', name)
+
+def make_key(*parts):
+	'''Hash parts (which may be bytes or str) into a cache key.'''
+	h = hashlib.sha256()
+	for part in parts:
+		if isinstance(part, str):
+			part = part.encode('UTF-8')
+		# Length prefix the parts so that different splits of the same
+		# text cannot collide
+		h.update(b'%d:' % len(part))
+		h.update(part)
+	return h.hexdigest()
+
+class _Cache(object):
+	DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+	def __init__(self, name, directory, max_size):
+		if directory is None:
+			directory = default_directory(name)
+		self.directory = directory
+		self.max_size = max_size
+		self._lock = threading.Lock()
+
+	def _path(self, key, suffix):
+		return os.path.join(self.directory, key + suffix)
+
+	def _store(self, key, suffix, write):
+		'''Create a new entry, using write(path) to populate it.'''
+		os.makedirs(self.directory, exist_ok=True)
+
+		# Write and rename so that partially written entries are never
+		# visible to other users of the cache
+		(fd, tmpname) = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		os.close(fd)
+		try:
+			write(tmpname)
+			os.replace(tmpname, self._path(key, suffix))
+		except:
+			os.unlink(tmpname)
+			raise
+
+		self.evict()
+
+	def evict(self):
+		'''Remove the least recently used entries until the total size
+		of the cache is no more than max_size.'''
+		with self._lock:
+			entries = []
+			for entry in os.scandir(self.directory):
+				if entry.name.endswith('.tmp'):
+					continue
+				try:
+					st = entry.stat()
+				except FileNotFoundError:
+					continue
+				entries.append((st.st_mtime, st.st_size, entry.path))
+
+			total = sum([size for (unused, size, unused) in entries])
+			for (unused, size, path) in sorted(entries):
+				if total <= self.max_size:
+					break
+				try:
+					os.unlink(path)
+				except FileNotFoundError:
+					pass
+				total -= size
+
+class RenderCache(_Cache):
+	'''Cache of rendered output files, keyed by make_key().'''
+
+	def __init__(self, directory=None, max_size=_Cache.DEFAULT_MAX_SIZE):
+		_Cache.__init__(self, 'render', directory, max_size)
+
+	def fetch(self, key, suffix, fname):
+		'''Copy a cached entry to fname, returning False on a cache miss.'''
+		path = self._path(key, suffix)
+		try:
+			shutil.copyfile(path, fname)
+			os.utime(path) # Mark as recently used
+		except FileNotFoundError:
+			return False
+		return True
+
+	def store(self, key, suffix, fname):
+		'''Copy fname into the cache and evict any old entries.'''
+		self._store(key, suffix, lambda path: shutil.copyfile(fname, path))
+
+class EventCache(_Cache):
+	'''Cache of serialized formatter event streams, keyed by make_key().'''
+
+	DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+	def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+		_Cache.__init__(self, 'events', directory, max_size)
+
+	def load(self, key):
+		'''Return the cached data for key (or None on a cache miss).'''
+		path = self._path(key, '.events')
+		try:
+			with open(path, 'rb') as f:
+				data = f.read()
+			os.utime(path) # Mark as recently used
+		except FileNotFoundError:
+			return None
+		return data
+
+	def store(self, key, data):
+		def write(path):
+			with open(path, 'wb') as f:
+				f.write(data)
+		self._store(key, '.events', write)
@@ -0,0 +1,261 @@
+'''A packed, memory-mapped library of parsed scores.
+
+A corpus file holds many vtab.score.Score objects in columnar form so
+that a large library can be iterated, searched or rendered without
+opening and parsing every .vtab file. The layout (all integers are
+little-endian) is:
+
+  header:  magic, version, number of scores, offset of the index
+  data:    one block per score holding its columns back-to-back, each
+           block starting on an 8 byte boundary
+  names:   the UTF-8 encoded name of every score
+  index:   one fixed size entry per score (see Entry)
+
+Only the header and the index are read when a corpus is opened; the
+data for each score is paged in from the memory map on demand.
+'''
+
+import array
+import collections
+import json
+import mmap
+import os
+import struct
+import sys
+from fractions import Fraction
+
+from .score import Score
+
+CORPUS_VERSION = 1
+
+MAGIC = b'VTCP'
+
+HEADER = struct.Struct('<4sHHIQ')
+
+DATA_START = 24
+
+INDEX_ENTRY = struct.Struct('<QIIIIIIH')
+
+'''The index entry for a single score. Everything except the name is
+available without touching the score's data block.'''
+Entry = collections.namedtuple('Entry', ('name', 'offset', 'events',
+		'attributes', 'barlines', 'notes', 'strings'))
+
+def _align(n):
+	return (n + 7) & ~7
+
+def _columns(entry):
+	'''Return (attribute name, typecode, count) for each column of the
+	data block described by entry, in the order they are stored.
+
+	The widest columns come first so that every column is naturally
+	aligned.
+	'''
+	cells = entry.notes * entry.strings
+	return (('duration_num', 'q', entry.notes),
+		('duration_den', 'q', entry.notes),
+		('bars', 'q', entry.notes),
+		('pitches', 'h', cells),
+		('kinds', 'B', entry.events),
+		('barlines', 'B', entry.barlines),
+		('articulations', 'B', cells),
+		('ties', 'B', entry.notes))
+
+def encode_score(score, name=None, offset=0):
+	'''Encode score as a data block (the columns back-to-back followed by
+	the attributes) without any padding.
+
+	Returns the Entry describing the block and the block itself.
+	'''
+	attributes = _encode_attributes(score.attributes)
+	entry = Entry(name, offset, len(score.kinds), len(attributes),
+			len(score.barlines), score.num_notes, score.strings)
+
+	block = []
+	for (column, typecode, count) in _columns(entry):
+		data = getattr(score, column)
+		assert(data.typecode == typecode and len(data) == count)
+		if sys.byteorder != 'little':
+			data = array.array(typecode, data)
+			data.byteswap()
+		block.append(data.tobytes())
+	block.append(attributes)
+	return (entry, b''.join(block))
+
+def decode_score(entry, data, pos=0):
+	'''Decode the data block, described by entry, that starts at
+	data[pos].
+
+	Raises ValueError if data is too short to hold the block.
+	'''
+	score = Score(entry.strings)
+	with memoryview(data) as view:
+		for (column, typecode, count) in _columns(entry):
+			column = getattr(score, column)
+			size = count * column.itemsize
+			if pos + size > len(view):
+				raise ValueError('score data is truncated')
+			column.frombytes(view[pos:pos + size])
+			if sys.byteorder != 'little':
+				column.byteswap()
+			pos += size
+		if pos + entry.attributes > len(view):
+			raise ValueError('score data is truncated')
+		score.attributes = _decode_attributes(
+				bytes(view[pos:pos + entry.attributes]))
+	return score
+
+def _encode_attributes(attributes):
+	encoded = []
+	for (key, value) in attributes:
+		if isinstance(value, Fraction):
+			value = [value.numerator, value.denominator]
+		encoded.append([key, value])
+	return json.dumps(encoded, separators=(',', ':')).encode('UTF-8')
+
+def _decode_attributes(data):
+	attributes = []
+	for (key, value) in json.loads(data.decode('UTF-8')):
+		if isinstance(value, list):
+			value = Fraction(*value)
+		attributes.append((key, value))
+	return attributes
+
+class CorpusWriter(object):
+	'''Write scores, one at a time, into a new corpus file.
+
+	When used as a context manager the corpus is completed on exit
+	unless an exception is raised, in which case the partially written
+	file is removed (see abort()).
+	'''
+
+	def __init__(self, fname):
+		self.fname = fname
+		self.f = open(fname, 'wb')
+		self.f.write(bytes(DATA_START))
+		self._offset = DATA_START
+		self._entries = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, *unused):
+		if exc_type is None:
+			self.close()
+		else:
+			self.abort()
+
+	def add(self, name, score):
+		(entry, block) = encode_score(score, name, self._offset)
+		self.f.write(block)
+
+		size = len(block)
+		padding = _align(size) - size
+		self.f.write(bytes(padding))
+		self._offset += size + padding
+		self._entries.append(entry)
+
+	def close(self):
+		if self.f.closed:
+			return
+
+		names = []
+		name_offset = self._offset
+		for entry in self._entries:
+			name = entry.name.encode('UTF-8')
+			names.append((name_offset, len(name)))
+			self.f.write(name)
+			name_offset += len(name)
+
+		for (entry, (offset, length)) in zip(self._entries, names):
+			self.f.write(INDEX_ENTRY.pack(entry.offset, offset, length,
+					entry.events, entry.attributes, entry.barlines,
+					entry.notes, entry.strings))
+
+		self.f.seek(0)
+		self.f.write(HEADER.pack(MAGIC, CORPUS_VERSION, 0,
+				len(self._entries), name_offset))
+		self.f.close()
+
+	def abort(self):
+		'''Discard the corpus, removing the partially written file.'''
+		if self.f.closed:
+			return
+		self.f.close()
+		os.unlink(self.fname)
+
+def write(fname, scores):
+	'''Write an iterable of (name, score) tuples into a new corpus.'''
+	with CorpusWriter(fname) as writer:
+		for (name, score) in scores:
+			writer.add(name, score)
+
+class Corpus(object):
+	'''A read-only, memory-mapped corpus file.'''
+
+	def __init__(self, fname):
+		with open(fname, 'rb') as f:
+			self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+		try:
+			self._read_index()
+		except:
+			self._map.close()
+			raise
+
+	def _read_index(self):
+		if len(self._map) < DATA_START:
+			raise ValueError('not a vtab corpus')
+		(magic, version, unused, count, index) = \
+				HEADER.unpack_from(self._map, 0)
+		if magic != MAGIC:
+			raise ValueError('not a vtab corpus')
+		if version != CORPUS_VERSION:
+			raise ValueError('unsupported corpus version %d' % version)
+		if index + count * INDEX_ENTRY.size > len(self._map):
+			raise ValueError('corpus is truncated')
+
+		self.entries = []
+		self._names = {}
+		for (offset, name_offset, name_length, events, attributes,
+				barlines, notes, strings) in \
+				INDEX_ENTRY.iter_unpack(self._map[index:index +
+						count * INDEX_ENTRY.size]):
+			name = self._map[name_offset:name_offset +
+					name_length].decode('UTF-8')
+			self._names.setdefault(name, len(self.entries))
+			self.entries.append(Entry(name, offset, events, attributes,
+					barlines, notes, strings))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __iter__(self):
+		'''Iterate over every (name, score) in the corpus.'''
+		for i in range(len(self.entries)):
+			yield (self.entries[i].name, self.score(i))
+
+	@property
+	def names(self):
+		return [entry.name for entry in self.entries]
+
+	def find(self, name):
+		'''Return the index of the (first) score called name.'''
+		try:
+			return self._names[name]
+		except KeyError:
+			raise KeyError('%s is not in the corpus' % name)
+
+	def score(self, i):
+		'''Return the ith score in the corpus.'''
+		entry = self.entries[i]
+		return decode_score(entry, self._map, entry.offset)
+
+	def close(self):
+		self._map.close()
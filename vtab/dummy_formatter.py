@@ -14,4 +14,7 @@ class DummyFormatter(object):
 				print('%s%s' % (name, args), file=self.f)
 			else:
 				print('%s%s%s' % (name, args, kwargs), file=self.f)
+
+		# Cache the method so it is only generated once per name
+		setattr(self, name, dump_args)
 		return dump_args
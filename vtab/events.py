@@ -0,0 +1,102 @@
+'''Record, serialize and replay the formatter event stream.
+
+The parser turns vtab into a sequence of format_attribute(),
+format_barline() and format_note() calls. Recording that sequence (as a
+vtab.score.Score) allows it to be replayed into any number of formatters
+without parsing the source again. parse_cached() uses this, together
+with an EventCache, to avoid re-parsing files that have not changed.
+
+A serialized score is a header (the magic and the sizes of each column,
+as little-endian integers) followed by the zlib compressed data block
+used by vtab.corpus. Nothing is ever unpickled so loading a corrupt or
+malicious cache entry can, at worst, raise ValueError.
+'''
+
+import io
+import struct
+import zlib
+
+from .cache import EventCache, make_key
+from .corpus import Entry, decode_score, encode_score
+from .vtab_parser import VtabParser
+
+# Increment whenever the parser, or the Score encoding, changes in a way
+# that would make previously recorded events stale
+EVENTS_VERSION = 3
+
+MAGIC = b'VTEV'
+
+HEADER = struct.Struct('<4sIIIIH')
+
+def dumps(score):
+	'''Serialize a recorded score into a compact binary form.'''
+	(entry, block) = encode_score(score)
+	return HEADER.pack(MAGIC, entry.events, entry.attributes,
+			entry.barlines, entry.notes, entry.strings) + \
+			zlib.compress(block)
+
+def loads(data):
+	'''Deserialize a score previously serialized with dumps().'''
+	if len(data) < HEADER.size:
+		raise ValueError('not a vtab event stream')
+	(magic, events, attributes, barlines, notes, strings) = \
+			HEADER.unpack_from(data)
+	if magic != MAGIC:
+		raise ValueError('not a vtab event stream')
+	try:
+		block = zlib.decompress(data[HEADER.size:])
+	except zlib.error as e:
+		raise ValueError('corrupt vtab event stream (%s)' % (e,))
+	return decode_score(Entry(None, 0, events, attributes, barlines, notes,
+			strings), block)
+
+def parse_cached(fname, formatters, cache=None):
+	'''Parse fname, sending the resulting events to formatters.
+
+	If the cache holds the events for a file with identical content then
+	they are replayed without parsing the file. Each file is parsed
+	using a fresh VtabParser (parser state never carries over from
+	earlier files).
+
+	Returns the number of (internal) errors encountered. Files that
+	cause internal errors are never cached. An unusable cache is
+	simply not used.
+	'''
+	if cache is None:
+		cache = EventCache()
+
+	# Read the file once so that the events cached are, guaranteed, those
+	# of the content that was hashed
+	with open(fname, 'rb') as f:
+		data = f.read()
+	key = make_key(str(EVENTS_VERSION), data)
+
+	try:
+		cached = cache.load(key)
+	except EnvironmentError:
+		cached = None
+	if cached is not None:
+		try:
+			score = loads(cached)
+		except Exception:
+			score = None # Corrupt cache entry; just re-parse
+		if score is not None:
+			score.render(*formatters)
+			return 0
+
+	p = VtabParser()
+	score = p.new_score()
+	for formatter in formatters:
+		p.add_formatter(formatter)
+	p.add_formatter(score)
+
+	f = io.StringIO(data.decode('UTF-8'), newline=None)
+	f.name = fname
+	num_errors = p.parse_file(f)
+
+	if 0 == num_errors:
+		try:
+			cache.store(key, dumps(score))
+		except EnvironmentError:
+			pass
+	return num_errors
@@ -0,0 +1,31 @@
+'''Common base class for the output formatters.'''
+
+import functools
+
+class Formatter(object):
+	'''Base class for formatters.
+
+	Attributes are dispatched by name: format_attribute(key, value)
+	calls format_<key>(value) and, if the formatter has no such method,
+	unsupported_attribute(key, value).
+
+	VtabParser looks up (and caches) the handler for each key using
+	handler() so the methods of a Formatter must not change once it has
+	been added to a parser.
+	'''
+
+	def handler(self, key):
+		'''Return a callable that handles the value of attribute key.'''
+		try:
+			fn = getattr(self, 'format_' + key)
+		except AttributeError:
+			fn = None
+		if None == fn:
+			fn = functools.partial(self.unsupported_attribute, key)
+		return fn
+
+	def format_attribute(self, key, value):
+		self.handler(key)(value)
+
+	def unsupported_attribute(self, key, value):
+		pass
@@ -2,6 +2,7 @@ import re, string, sys, unittest
 from fractions import Fraction
 import vtab.note
 from vtab import tunings
+from vtab.formatter import Formatter
 
 
 VERSION='''\
@@ -38,14 +39,17 @@ $(if (not (ly:get-option 'afive)) #{
 }
 '''
 MELODY=string.Template('''\
-Melody = {
+Melody${id} = {
   \\voiceOne
   \\key ${key}
   \\time ${time}
   ${melody}
 }
 ''')
-FINALIZE='''\
+# Streaming mode writes the melody between these two halves itself
+(MELODY_START, MELODY_END) = MELODY.template.split('${melody}')
+MELODY_START = string.Template(MELODY_START)
+DEFINITIONS='''\
 NoStringNumbers = {
   % Setting the stencil to false causes problems placing other objects
   \\override StringNumber #'transparent = ##t
@@ -57,54 +61,116 @@ NoStems = {
   \\override Stem #'stencil = ##f
 }
 
-StaffMelody = {
+'''
+# The variables defined here are suffixed with ${id} so that several
+# scores can be defined within a single document (see book mode)
+GUITAR=string.Template('''\
+StaffMelody${id} = {
   \\NoStringNumbers
-  \\Melody
+  \\Melody${id}
 }
 
-TabMelody  = {
+TabMelody${id}  = {
   \\NoStems
   \\removeWithTag #'chords
   \\removeWithTag #'texts
-  \\Melody
+  \\Melody${id}
 }
 
-GuitarStaffAndTab = <<
+GuitarStaffAndTab${id} = <<
   \\new StaffGroup = "Guitar" <<
     \\new Staff = "TraditionalStaff" <<
       \\clef "treble_8"
-      \\context Voice = "Melody" { \\StaffMelody }
+      \\context Voice = "Melody" { \\StaffMelody${id} }
     >>
     \\new TabStaff = "TabStaff" <<
-      \\context TabVoice = "Melody" { \\TabMelody }
+      \\context TabVoice = "Melody" { \\TabMelody${id} }
     >>
   >>
 >>
 
-GuitarTabOnly = <<
+GuitarTabOnly${id} = <<
   \\new StaffGroup = "Guitar" <<
     \\new TabStaff = "TabStaff" <<
-      \\context TabVoice = "Melody" { \TabMelody }
+      \\context TabVoice = "Melody" { \\TabMelody${id} }
     >>
   >>
 >>
 
-Guitar =
+Guitar${id} =
 $(if (ly:get-option 'afive) #{
-\GuitarTabOnly
+\\GuitarTabOnly${id}
 #}
 #{
-\GuitarStaffAndTab
+\\GuitarStaffAndTab${id}
 #})
 
+''')
+FINALIZE = DEFINITIONS + GUITAR.safe_substitute(id='') + '''\
 \\score { \\Guitar }
 '''
+BOOK_HEADER='''\
+\\header {
+  tagline = ##f
+}
+'''
+BOOKPART=string.Template('''\
+  \\bookpart {
+    \\header {
+      title = ${title}
+      composer = ${composer}
+    }
+    \\score { \\Guitar${id} }
+  }
+''')
+
+def score_id(n):
+	'''Generate a unique (alphabetic) suffix for the nth score of a book.
+
+	lilypond variable names cannot contain digits so scores are
+	numbered A, B, ..., Z, AA, AB, ...
+	'''
+	s = ''
+	n += 1
+	while n > 0:
+		(n, digit) = divmod(n - 1, 26)
+		s = chr(ord('A') + digit) + s
+	return s
+
+class LilypondFormatter(Formatter):
+	# Increment whenever a change to the formatter (or the way the output
+	# is rendered) would make previously rendered output stale
+	FORMAT_VERSION = 1
+
+	def __init__(self, book=False, streaming=False):
+		'''Create a new formatter.
+
+		By default each call to flush() writes a complete lilypond
+		document and starts a new score. In book mode flush() instead
+		completes the current score and flush_book() writes a single
+		document containing every score (allowing an entire songbook to
+		be rendered by one lilypond process).
+
+		In streaming mode the header is written as soon as the first
+		note is formatted and, after that, only the most recent note is
+		held back (a later note may need to tie or slur to it). The
+		output is identical to the default mode provided the title,
+		composer and key all precede the first note; if not, the
+		attribute is ignored and an ERROR comment is written instead.
+		Streaming cannot be combined with book mode.
+		'''
+		if book and streaming:
+			raise ValueError('book mode cannot be streamed')
 
-class LilypondFormatter(object):
-	def __init__(self):
 		self.f = sys.stdout
 		self.set_tuning(tunings.STANDARD_TUNING)
 
+		self._book = book
+		self._streaming = streaming
+		self._scores = []
+		self._reset_score()
+
+	def _reset_score(self):
 		self._attributes = {
 			'key' : 'c \\major',
 			'time' : '4/4',
@@ -118,6 +184,8 @@ class LilypondFormatter(object):
 		self._text = None
 		self._brace_count = 0
 		self._inside_slur = False
+		self._started = False
+		self._separator = ''
 
 	def set_file(self, f):
 		self.f = f
@@ -125,15 +193,8 @@ class LilypondFormatter(object):
 	def set_tuning(self, tuning):
 		self._tuning = tuning
 
-	def format_attribute(self, key, value):
-		try:
-			fn = getattr(self, 'format_' + key)
-		except:
-			fn = None
-		if None != fn:
-			fn(value)
-		else:
-			self.format_comment("ERROR: Unsupported attribute (%s: '%s')\n" % (key, value))
+	def unsupported_attribute(self, key, value):
+		self.format_comment("ERROR: Unsupported attribute (%s: '%s')\n" % (key, value))
 
 	def format_articulation(self, articulation):
 		if articulation == 'D':
@@ -150,6 +211,8 @@ class LilypondFormatter(object):
 		self._melody.append('% ' + comment + '\n')
 
 	def format_composer(self, composer):
+		if self._header_written('composer'):
+			return
 		self._attributes['composer'] = composer
 
 	def format_duration(self, duration):
@@ -159,6 +222,8 @@ class LilypondFormatter(object):
 
 	def format_key(self, key):
 		assert(len(key) > 0)
+		if self._header_written('key'):
+			return
 
 		tonality = ' \\major'
 		if key[-1] == 'm':
@@ -178,6 +243,8 @@ class LilypondFormatter(object):
 		pass
 
 	def format_title(self, title):
+		if self._header_written('title'):
+			return
 		self._attributes['title'] = title
 
 	def format_barline(self, attributes):
@@ -224,13 +291,12 @@ class LilypondFormatter(object):
 			lynote = 'r'
 
 		if duration.numerator == 3:
-			remaining_duration = duration - duration/3
-			dot = '.'
+			# Dotted note; the undotted part is 2/3 of the duration
+			assert(duration.denominator % 2 == 0)
+			lyduration = str(duration.denominator // 2) + '.'
 		else:
-			remaining_duration = duration
-			dot = ''
-		assert(remaining_duration.numerator == 1)
-		lyduration = str(remaining_duration.denominator) + dot
+			assert(duration.numerator == 1)
+			lyduration = str(duration.denominator)
 		lytext = ''
 		if self._text:
 			lytext = '^"%s"' % self._text
@@ -249,17 +315,41 @@ class LilypondFormatter(object):
 		if not slur and self._inside_slur:
 			self._melody[self._melody_last_note] += ')'
 			self._inside_slur = False
+		if self._streaming:
+			self._stream_melody()
 		self._melody_last_note = len(self._melody)
 		self._melody.append(lynote + lyduration + lytext)
 
-	def flush(self):
+	def _header_written(self, attr):
+		'''Check whether (when streaming) the document header, and
+		therefore attr, has already been written.'''
+		if self._started:
+			self.format_comment(("ERROR: Cannot change %s after the " +
+					"first note when streaming\n") % (attr))
+		return self._started
+
+	def _stream_melody(self):
+		'''Write (starting the document if needed) every buffered item.'''
+		if not self._started:
+			self._quote_header()
+			self.f.write(VERSION)
+			self.f.write(HEADER.safe_substitute(self._attributes))
+			self.f.write(PAPER)
+			self.f.write(MELODY_START.safe_substitute(self._attributes, id=''))
+			self._started = True
+
+		for item in self._melody:
+			self.f.write(self._separator + item)
+			self._separator = '  '
+		self._melody = []
+
+	def _close_repeats(self):
 		while self._brace_count > 0:
 			self._melody.append('}')
 			self._brace_count -= 1
 		assert(self._brace_count >= 0)
 
-		self._attributes['melody'] = '  '.join(self._melody)
-
+	def _quote_header(self):
 		# Fixup the header attributes if needed
 		for attr in ('title', 'composer'):
 			if attr in self._attributes and '"' not in self._attributes[attr]:
@@ -267,8 +357,50 @@ class LilypondFormatter(object):
 			else:
 				self._attributes[attr] = '##f'
 
+	def _finish_score(self):
+		self._close_repeats()
+		self._attributes['melody'] = '  '.join(self._melody)
+		self._quote_header()
+
+	def flush(self):
+		if self._streaming:
+			self._close_repeats()
+			self._stream_melody()
+			self.f.write(MELODY_END)
+			self.f.write(FINALIZE)
+			self._reset_score()
+			return
+
+		if self._book:
+			if len(self._melody) or 'title' in self._attributes:
+				self._finish_score()
+				self._attributes['id'] = score_id(len(self._scores))
+				self._scores.append(self._attributes)
+			self._reset_score()
+			return
+
+		self._finish_score()
 		self.f.write(VERSION)
 		self.f.write(HEADER.safe_substitute(self._attributes))
 		self.f.write(PAPER)
-		self.f.write(MELODY.safe_substitute(self._attributes))
+		self.f.write(MELODY.safe_substitute(self._attributes, id=''))
 		self.f.write(FINALIZE)
+		self._reset_score()
+
+	def flush_book(self):
+		'''Write every score collected (in book mode) as a single book.'''
+		assert(self._book)
+		self.flush()
+
+		self.f.write(VERSION)
+		self.f.write(BOOK_HEADER)
+		self.f.write(PAPER)
+		self.f.write(DEFINITIONS)
+		for score in self._scores:
+			self.f.write(MELODY.safe_substitute(score))
+			self.f.write(GUITAR.safe_substitute(score))
+		self.f.write('\\book {\n')
+		for score in self._scores:
+			self.f.write(BOOKPART.safe_substitute(score))
+		self.f.write('}\n')
+		self._scores = []
@@ -0,0 +1,113 @@
+'''Export parsed tab as a NumPy structured array.
+
+Each note event (including rests) becomes one row of the array, allowing
+statistics such as range, fret usage or note density to be computed with
+vectorized operations. The fields of each row are:
+
+  file:         index of the file the event came from (see load())
+  pitch:        MIDI pitch for each string (NO_NOTE if not played)
+  fret:         fret for each string (NO_NOTE if not played)
+  articulation: articulation bits for each string (see vtab.score)
+  onset:        start of the event, in ticks, from the start of the file
+  duration:     length of the event in ticks
+  exact:        False if the onset or duration had to be rounded
+  bar:          number of barlines that precede the event
+  tie:          True if the event is tied to the previous one
+
+Ticks are VtabParser.TICKS_PER_WHOLE_NOTE to the whole note. Unusual
+note lengths (such as 1/11) cannot be represented exactly; the end of
+every event is then rounded to the nearest tick (so rounding errors
+never accumulate) and exact is False for any event that starts or ends
+between two ticks.
+
+NumPy is an optional dependency; it is only imported when an array is
+actually requested.
+'''
+
+import itertools
+from fractions import Fraction
+
+from . import tunings
+from .score import NO_NOTE
+from .vtab_parser import VtabParser
+
+TICKS_PER_WHOLE_NOTE = VtabParser.TICKS_PER_WHOLE_NOTE
+
+def _numpy():
+	try:
+		import numpy
+	except ImportError:
+		raise ImportError('vtab.matrix requires NumPy (try: pip install numpy)')
+	return numpy
+
+def dtype(strings=6):
+	'''Return the dtype of the arrays produced by note_matrix().'''
+	np = _numpy()
+	return np.dtype([
+		('file', np.int32),
+		('pitch', np.int16, (strings,)),
+		('fret', np.int16, (strings,)),
+		('articulation', np.uint8, (strings,)),
+		('onset', np.int64),
+		('duration', np.int64),
+		('exact', np.bool_),
+		('bar', np.int32),
+		('tie', np.bool_),
+	])
+
+def note_matrix(score, tuning=tunings.STANDARD_TUNING, file=0):
+	'''Convert a vtab.score.Score into a structured array.'''
+	np = _numpy()
+	(rows, strings) = (score.num_notes, score.strings)
+	if len(tuning) != strings:
+		raise ValueError('tuning does not match the number of strings')
+
+	matrix = np.zeros(rows, dtype=dtype(strings))
+	matrix['file'] = file
+
+	pitch = np.array(score.pitches, dtype=np.int32).reshape(rows, strings)
+	open_strings = np.array([int(n) for n in tuning], dtype=np.int32)
+	played = pitch != NO_NOTE
+	matrix['pitch'] = pitch
+	matrix['fret'] = np.where(played, pitch - open_strings, NO_NOTE)
+	matrix['articulation'] = np.array(score.articulations,
+			dtype=np.uint8).reshape(rows, strings)
+
+	num = np.array(score.duration_num, dtype=np.int64) * TICKS_PER_WHOLE_NOTE
+	den = np.array(score.duration_den, dtype=np.int64)
+	inexact = (num % den) != 0
+	if np.any(inexact):
+		ends = list(itertools.accumulate(Fraction(int(n), int(d))
+				for (n, d) in zip(num, den)))
+		end = np.array([round(t) for t in ends], dtype=np.int64)
+		onset = np.concatenate(([0], end[:-1]))
+		duration = end - onset
+		end_exact = np.array([t.denominator == 1 for t in ends])
+		matrix['exact'] = np.logical_and(end_exact,
+				np.concatenate(([True], end_exact[:-1])))
+	else:
+		duration = num // den
+		onset = np.cumsum(duration) - duration
+		matrix['exact'] = True
+	matrix['duration'] = duration
+	matrix['onset'] = onset
+
+	matrix['bar'] = np.array(score.bars, dtype=np.int32)
+	matrix['tie'] = np.array(score.ties, dtype=np.bool_)
+	return matrix
+
+def load(fnames, tuning=tunings.STANDARD_TUNING):
+	'''Parse every file in fnames into a single structured array.
+
+	The file field of each row is the index (into fnames) of the file the
+	row came from.
+	'''
+	np = _numpy()
+	matrices = []
+	for (i, fname) in enumerate(fnames):
+		with open(fname) as f:
+			score = VtabParser().parse_score(f)
+		matrices.append(note_matrix(score, tuning, i))
+	if not matrices:
+		return np.zeros(0, dtype=dtype(len(tuning)))
+	return np.concatenate(matrices)
@@ -3,11 +3,21 @@ import re
 HAMMER_ON = 'hammer-on'
 PULL_OFF = 'pull-off'
 
+# Shared by every note that has no articulation metadata (almost all of
+# them) so that notes need not allocate a set of their own.
+NO_ARTICULATION = frozenset()
+
+# Pitches in this range are covered by the lookup tables (and the shared
+# notes) below
+MIDI_RANGE = 128
+
 class Note(object):
 	'''
 	classdocs
 	'''
 
+	__slots__ = ('pitch', 'articulation')
+
 	RE_PITCH = re.compile(r'([A-G])([#b]{0,1})([0-9])')
 
 	MIDI_OFFSET = 12
@@ -15,11 +25,14 @@ class Note(object):
 	VALID_ARTICULATION = ( HAMMER_ON, PULL_OFF )
 
 	def __init__(self, s):
-		try:
-			self.pitch = int(s)
-		except:
-			self.set(s)
-		self.articulation = set()
+		if isinstance(s, str) and s in _PITCH:
+			self.pitch = _PITCH[s]
+		else:
+			try:
+				self.pitch = int(s)
+			except:
+				self.set(s)
+		self.articulation = NO_ARTICULATION
 
 	def __hash__(self):
 		return int(self)
@@ -43,78 +56,42 @@ class Note(object):
 		return int(self) > int(other)
 
 	def __add__(self, other):
-		return Note(self.pitch + int(other))
+		return shared(self.pitch + int(other))
 
 	def __sub__(self, other):
 		if isinstance(other, Note):
 			return self.pitch - other.pitch
 		else:
-			return Note(self.pitch - int(other))
+			return shared(self.pitch - int(other))
 
 	def __repr__(self):
-		me = self.decompose()
-		return me[0] + me[1] + str(me[2])
+		pitch = self.pitch
+		if 0 <= pitch < MIDI_RANGE:
+			return _NAME[pitch]
+		return _name(pitch)
 
 	def decompose(self):
-		octave = int((self.pitch - self.MIDI_OFFSET) / 12)
-		semitone = (self.pitch - self.MIDI_OFFSET) % 12
-
-		letter =    'CCDDEFFGGAAB'[semitone]
-		sharpflat = ' # #  # # # '[semitone].strip()
-
-		return (letter, sharpflat, octave)
+		pitch = self.pitch
+		if 0 <= pitch < MIDI_RANGE:
+			return _DECOMPOSITION[pitch]
+		return _decompose(pitch)
 
 	def to_lilypond(self):
-		(letter, sharpflat, octave) = self.decompose()
-		letter = letter.lower()
-		if sharpflat == '#':
-			letter += 'is'
-		elif sharpflat == 'b':
-			letter += 'es'
-		else:
-			assert sharpflat == ''
-
-		if octave > 3:
-			letter += "'" * (octave - 3)
-		elif octave < 3:
-			letter += ',' * (3 - octave)
-
-		return letter
+		pitch = self.pitch
+		if 0 <= pitch < MIDI_RANGE:
+			return _LILYPOND[pitch]
+		return _to_lilypond(pitch)
 
 	def set(self, s):
-		m = self.RE_PITCH.match(s)
-
-		letter = m.group(1)
-		sharpflat = m.group(2)
-		octave = m.group(3)
-
-		if letter == 'C':
-			self.pitch = 0
-		elif letter == 'D':
-			self.pitch = 2
-		elif letter == 'E':
-			self.pitch = 4
-		elif letter == 'F':
-			self.pitch = 5
-		elif letter == 'G':
-			self.pitch = 7
-		elif letter == 'A':
-			self.pitch = 9
-		elif letter == 'B':
-			self.pitch = 11
-		else:
-			assert(0)
-
-		if sharpflat == '#':
-			self.pitch += 1
-		elif sharpflat == 'b':
-			self.pitch -= 1
-		elif sharpflat == '':
-			pass
-		else:
-			assert(0)
-
-		self.pitch += self.MIDI_OFFSET + 12 * int(octave)
+		try:
+			self.pitch = _PITCH[s]
+		except KeyError:
+			# Fall back to the regular expression to handle names
+			# with trailing characters (e.g. 'C#4 ')
+			m = self.RE_PITCH.match(s)
+			if m is None:
+				raise ValueError("Cannot parse note name '%s'" % (s,))
+			self.pitch = _PITCH[m.group(0)]
 
 	def __int__(self):
 		return self.pitch
@@ -127,7 +104,7 @@ class Note(object):
 
 		"""
 		assert(a in self.VALID_ARTICULATION)
-		self.articulation.add(a)
+		self.articulation = self.articulation.union((a,))
 
 	def remove_articulation(self, a):
 		"""Remove articulation metadata from the current note.
@@ -137,9 +114,99 @@ class Note(object):
 
 		"""
 		assert(a in self.VALID_ARTICULATION)
-		self.articulation.discard(a)
+		self.articulation = self.articulation.difference((a,))
 
 	def has_articulation(self, a):
 		"""Test whether the note includes a specific item of metadata."""
 		assert(a in self.VALID_ARTICULATION)
 		return a in self.articulation
+
+def _decompose(pitch):
+	octave = int((pitch - Note.MIDI_OFFSET) / 12)
+	semitone = (pitch - Note.MIDI_OFFSET) % 12
+
+	letter =    'CCDDEFFGGAAB'[semitone]
+	sharpflat = ' # #  # # # '[semitone].strip()
+
+	return (letter, sharpflat, octave)
+
+def _name(pitch):
+	me = _decompose(pitch)
+	return me[0] + me[1] + str(me[2])
+
+def _to_lilypond(pitch):
+	(letter, sharpflat, octave) = _decompose(pitch)
+	letter = letter.lower()
+	if sharpflat == '#':
+		letter += 'is'
+	elif sharpflat == 'b':
+		letter += 'es'
+	else:
+		assert sharpflat == ''
+
+	if octave > 3:
+		letter += "'" * (octave - 3)
+	elif octave < 3:
+		letter += ',' * (3 - octave)
+
+	return letter
+
+# Conversion tables, indexed by MIDI pitch, so that the common conversions
+# are a simple lookup
+_DECOMPOSITION = tuple([_decompose(pitch) for pitch in range(MIDI_RANGE)])
+_NAME = tuple([_name(pitch) for pitch in range(MIDI_RANGE)])
+_LILYPOND = tuple([_to_lilypond(pitch) for pitch in range(MIDI_RANGE)])
+
+def _build_pitch_table():
+	table = {}
+	for (letter, semitone) in zip('CDEFGAB', (0, 2, 4, 5, 7, 9, 11)):
+		for (sharpflat, offset) in (('', 0), ('#', 1), ('b', -1)):
+			for octave in range(10):
+				table[letter + sharpflat + str(octave)] = \
+					Note.MIDI_OFFSET + 12 * octave + semitone + offset
+	return table
+
+# Every note name understood by Note.set(), mapped to its MIDI pitch
+_PITCH = _build_pitch_table()
+
+class SharedNote(Note):
+	"""An immutable note that can safely be shared by many users.
+
+	Shared notes are returned by shared() and by note arithmetic. They
+	cannot be modified; create a new Note from a shared note in order
+	to attach articulation metadata.
+
+	"""
+
+	__slots__ = ()
+
+	def _immutable(self, *args):
+		raise TypeError('shared notes cannot be modified')
+
+	set = _immutable
+	add_articulation = _immutable
+	remove_articulation = _immutable
+
+	def __init__(self, pitch):
+		self.pitch = pitch
+		self.articulation = NO_ARTICULATION
+
+# Flyweight notes covering the full MIDI range
+_SHARED_NOTES = tuple([SharedNote(pitch) for pitch in range(MIDI_RANGE)])
+
+def shared(s):
+	"""Return the shared, immutable note for s.
+
+	s may be a MIDI pitch, a Note or a note name (such as 'C#4'). Notes
+	within the MIDI range are interned, so repeated requests for the same
+	pitch return the same object.
+
+	"""
+	try:
+		pitch = int(s)
+	except:
+		pitch = int(Note(s))
+
+	if 0 <= pitch < len(_SHARED_NOTES):
+		return _SHARED_NOTES[pitch]
+	return SharedNote(pitch)
@@ -0,0 +1,126 @@
+'''Measure where the time goes when converting vtab.
+
+A Profiler instruments a VtabParser (and its formatters) by wrapping
+methods of those particular instances, so nothing is changed (and
+nothing costs any time) unless profiling has been requested. Time is
+charged to the innermost stage that is running, giving the self time of
+each stage:
+
+  classify:  VtabParser.parse() (classifying lines, barlines, keys)
+  tokenize:  splitting lines into tokens (including shlex)
+  notes:     parsing notes (fret to Note arithmetic)
+  format:    the formatters' format_* methods
+  flush:     the formatters' flush() methods
+  output:    writing the formatted output
+  other:     everything else (such as reading the input)
+'''
+
+import cProfile
+import time
+
+STAGES = ('classify', 'tokenize', 'notes', 'format', 'flush', 'output',
+	  'other')
+
+class _TimedWriter(object):
+	'''Proxy for a file object that charges writes to the output stage.'''
+	def __init__(self, f, profiler):
+		self._f = f
+		self.write = profiler.wrap(f.write, 'output')
+		self.flush = profiler.wrap(f.flush, 'output')
+
+	def __getattr__(self, name):
+		return getattr(self._f, name)
+
+class Profiler(object):
+	def __init__(self, clock=time.perf_counter):
+		self._clock = clock
+		self.times = dict.fromkeys(STAGES, 0.0)
+		self.calls = dict.fromkeys(STAGES, 0)
+		self.events = {}
+		self.elapsed = 0.0
+		self._stack = ['other']
+		self._mark = clock()
+
+	def _enter(self, stage):
+		now = self._clock()
+		self.times[self._stack[-1]] += now - self._mark
+		self._stack.append(stage)
+		self._mark = now
+
+	def _leave(self):
+		now = self._clock()
+		self.times[self._stack.pop()] += now - self._mark
+		self._mark = now
+
+	def wrap(self, fn, stage, event=None):
+		'''Return a version of fn that charges its (self) time to stage
+		and, optionally, counts each call as an event.'''
+		calls = self.calls
+		events = self.events
+		if event is not None:
+			events.setdefault(event, 0)
+
+		def wrapper(*args, **kwargs):
+			calls[stage] += 1
+			if event is not None:
+				events[event] += 1
+			self._enter(stage)
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				self._leave()
+		return wrapper
+
+	def _instrument(self, obj, name, stage, event=None):
+		setattr(obj, name, self.wrap(getattr(obj, name), stage, event))
+
+	def instrument(self, parser):
+		'''Instrument parser and every formatter it has been given.'''
+		self._instrument(parser, 'parse', 'classify', 'line')
+		self._instrument(parser, '_tokenize', 'tokenize')
+		self._instrument(parser, 'parse_note', 'notes')
+		self._instrument(parser, 'format_attribute', 'format', 'attribute')
+		self._instrument(parser, 'format_barline', 'format', 'barline')
+		self._instrument(parser, 'format_note', 'format', 'note')
+
+		for formatter in parser.formatters:
+			if isinstance(formatter.f, _TimedWriter):
+				# Already instrumented (formatters may be shared by
+				# several parsers)
+				continue
+			self._instrument(formatter, 'flush', 'flush', 'flush')
+			formatter.set_file(_TimedWriter(formatter.f, self))
+
+	def run(self, fn, *args, dump=None):
+		'''Call fn(*args), recording the total elapsed time.
+
+		If dump is not None then fn also runs under cProfile and the
+		statistics are saved to the file called dump.
+		'''
+		start = self._clock()
+		self._mark = start
+		try:
+			if dump is None:
+				return fn(*args)
+			profile = cProfile.Profile()
+			try:
+				return profile.runcall(fn, *args)
+			finally:
+				profile.dump_stats(dump)
+		finally:
+			now = self._clock()
+			self.times[self._stack[-1]] += now - self._mark
+			self._mark = now
+			self.elapsed += now - start
+
+	def report(self, f):
+		'''Write a summary of the time spent in each stage to f.'''
+		total = self.elapsed or 1.0
+		f.write('%-10s %10s %7s %10s\n' % ('stage', 'seconds', '%', 'calls'))
+		for stage in STAGES:
+			f.write('%-10s %10.3f %6.1f%% %10d\n' % (stage,
+					self.times[stage], 100 * self.times[stage] / total,
+					self.calls[stage]))
+		f.write('%-10s %10.3f\n' % ('total', self.elapsed))
+		f.write('events: %s\n' % ', '.join(['%d %s' % (n, event)
+				for (event, n) in sorted(self.events.items())]))
@@ -0,0 +1,303 @@
+'''Render vtab files into PDF or SVG using lilypond.
+
+lilypond has a very high startup cost so files are rendered in parallel
+(with a bounded number of jobs). The vtab is parsed in-process and the
+resulting lilypond source piped directly into lilypond.
+'''
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+from .batch import job_count
+from .cache import RenderCache, make_key
+from .ly_formatter import LilypondFormatter
+from .vtab_parser import VtabParser
+from .watch import watch_files
+
+BACKENDS = ('pdf', 'svg')
+
+# elapsed is the time spent engraving (running lilypond and inkscape or
+# fetching the output from the cache) and parse_elapsed the time spent
+# parsing the vtab beforehand
+RenderResult = collections.namedtuple('RenderResult',
+		('fname', 'output', 'ok', 'elapsed', 'log', 'cached',
+		 'parse_elapsed'))
+
+def output_base(fname):
+	'''Return the output filename (without extension) for fname.
+
+	For example, songs/scale.vtab is rendered to songs/scale.pdf.
+	'''
+	if fname.endswith('.vtab'):
+		fname = fname[:-len('.vtab')]
+	return fname
+
+def lilypond_source(fname):
+	'''Parse fname and return a tuple containing the lilypond source,
+	the number of errors and any diagnostics issued by the parser.'''
+	source = io.StringIO()
+	diagnostics = io.StringIO()
+	with contextlib.redirect_stderr(diagnostics):
+		fmt = LilypondFormatter()
+		fmt.set_file(source)
+		p = VtabParser()
+		p.add_formatter(fmt)
+		with open(fname, encoding='UTF-8') as f:
+			num_errors = p.parse_file(f)
+
+	return (source.getvalue(), num_errors, diagnostics.getvalue())
+
+def book_source(fnames):
+	'''Parse fnames into a single lilypond book, returning a tuple in the
+	same form as lilypond_source().'''
+	source = io.StringIO()
+	diagnostics = io.StringIO()
+	num_errors = 0
+	with contextlib.redirect_stderr(diagnostics):
+		fmt = LilypondFormatter(book=True)
+		fmt.set_file(source)
+		for fname in fnames:
+			# A fresh parser for each score (so no state leaks between
+			# them) but a single formatter for the whole book
+			p = VtabParser()
+			p.add_formatter(fmt)
+			try:
+				with open(fname, encoding='UTF-8') as f:
+					num_errors += p.parse_file(f)
+			except EnvironmentError as e:
+				print('%s' % (e,), file=sys.stderr)
+				num_errors += 1
+			except UnicodeDecodeError as e:
+				print('%s: %s' % (fname, e), file=sys.stderr)
+				num_errors += 1
+				# Complete the part of the score already parsed
+				p.flush()
+				fmt.flush()
+		fmt.flush_book()
+
+	return (source.getvalue(), num_errors, diagnostics.getvalue())
+
+def _run(cmd, stdin=None):
+	proc = subprocess.run(cmd, input=stdin, stdout=subprocess.PIPE,
+			stderr=subprocess.STDOUT, universal_newlines=True)
+	return (proc.returncode, proc.stdout)
+
+def _parse(fname):
+	try:
+		return lilypond_source(fname)
+	except EnvironmentError as e:
+		return (None, 1, '%s\n' % (e,))
+	except UnicodeDecodeError as e:
+		return (None, 1, '%s: %s\n' % (fname, e))
+
+def _timed(fn, *args):
+	'''Call fn(*args), returning its result and the time it took.'''
+	start = time.perf_counter()
+	result = fn(*args)
+	return (result, time.perf_counter() - start)
+
+def _cache_key(source, backend, options, inkscape):
+	# inkscape post-processes SVG output so it is part of the key (an
+	# empty string meaning the canvas was not fitted to the drawing)
+	postprocess = ''
+	if backend == 'svg' and inkscape:
+		postprocess = inkscape
+	return make_key(str(LilypondFormatter.FORMAT_VERSION), backend,
+			'\0'.join(options), postprocess, source)
+
+def _fetch(cache, key, backend, output, log):
+	'''Fetch output from the cache, treating any error as a cache miss.'''
+	try:
+		return cache.fetch(key, '.' + backend, output)
+	except EnvironmentError as e:
+		log.append('warning: cannot read the render cache: %s\n' % (e,))
+		return False
+
+def _store(cache, key, backend, output, log):
+	'''Store output in the cache. Failing to do so is not an error (the
+	output itself is fine).'''
+	try:
+		cache.store(key, '.' + backend, output)
+	except EnvironmentError as e:
+		log.append('warning: cannot update the render cache: %s\n' % (e,))
+
+def _engrave(fname, backend, parsed, parse_elapsed, lilypond, inkscape,
+		options, cache):
+	# Timed from here, when the job actually starts, so that time spent
+	# queued behind other jobs is not counted
+	start = time.perf_counter()
+	(source, num_errors, diagnostics) = parsed
+	base = output_base(fname)
+	output = base + '.' + backend
+	log = [diagnostics]
+	ok = (0 == num_errors)
+	cached = False
+
+	if cache and source is not None:
+		key = _cache_key(source, backend, options, inkscape)
+
+	try:
+		if source is None:
+			ok = False
+		elif cache and _fetch(cache, key, backend, output, log):
+			cached = True
+		else:
+			cmd = [lilypond]
+			if backend == 'svg':
+				cmd.append('-dbackend=svg')
+			cmd += ['-d' + option for option in options]
+			cmd += ['-o', base, '-']
+			(returncode, out) = _run(cmd, source)
+			if 0 != returncode:
+				log.append(out)
+				ok = False
+			elif backend == 'svg' and inkscape:
+				(returncode, out) = _run([inkscape,
+					'--verb=FitCanvasToDrawing',
+					'--verb=FileSave',
+					'--verb=FileQuit',
+					output])
+				if 0 != returncode:
+					log.append(out)
+					ok = False
+
+			if 0 == returncode and cache:
+				_store(cache, key, backend, output, log)
+	except EnvironmentError as e:
+		log.append('%s\n' % (e,))
+		ok = False
+
+	return RenderResult(fname, output, ok,
+			time.perf_counter() - start, ''.join(log), cached,
+			parse_elapsed)
+
+def render(fname, backend='pdf', lilypond='lilypond', inkscape='inkscape',
+		options=(), cache=None):
+	'''Render a single file, returning a RenderResult.
+
+	options is a sequence of lilypond -d options (e.g. 'afive'). For the
+	SVG backend the canvas is resized to fit the drawing using inkscape
+	(unless inkscape is None). If a RenderCache is provided then output
+	whose lilypond source, formatter version, backend and options match
+	a previous render is copied from the cache instead of re-running
+	lilypond.
+	'''
+	assert(backend in BACKENDS)
+	(parsed, parse_elapsed) = _timed(_parse, fname)
+	return _engrave(fname, backend, parsed, parse_elapsed, lilypond,
+			inkscape, options, cache)
+
+def render_book(fnames, book, backend='pdf', lilypond='lilypond',
+		inkscape='inkscape', options=(), cache=None):
+	'''Render fnames as a single book using one lilypond process.
+
+	The output is written to book with a .pdf or .svg extension. See
+	render() for a description of the other arguments.
+	'''
+	assert(backend in BACKENDS)
+	(parsed, parse_elapsed) = _timed(book_source, fnames)
+	return _engrave(book, backend, parsed, parse_elapsed, lilypond,
+			inkscape, options, cache)
+
+def render_all(fnames, backend='pdf', jobs=None, lilypond='lilypond',
+		inkscape='inkscape', options=(), cache=None):
+	'''Render fnames, running up to jobs copies of lilypond at once.
+
+	Parsing happens on the calling thread (diagnostics are captured by
+	temporarily redirecting sys.stderr, which is not thread safe) and
+	only the external programs are run concurrently. Results are
+	yielded in the same order as fnames. See render() for a description
+	of the other arguments.
+	'''
+	assert(backend in BACKENDS)
+	if jobs is None:
+		jobs = os.cpu_count() or 1
+
+	with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+		futures = []
+		for fname in fnames:
+			(parsed, parse_elapsed) = _timed(_parse, fname)
+			futures.append(executor.submit(_engrave, fname, backend,
+					parsed, parse_elapsed, lilypond, inkscape,
+					options, cache))
+		for future in futures:
+			yield future.result()
+
+def _report(results):
+	num_failures = 0
+	for result in results:
+		sys.stderr.write(result.log)
+		if not result.ok:
+			status = 'FAILED'
+			num_failures += 1
+		elif result.cached:
+			status = 'ok (cached)'
+		else:
+			status = 'ok'
+		print('%s: %s -> %s (%.2fs, parsed in %.2fs)' % (result.fname,
+				status, result.output, result.elapsed,
+				result.parse_elapsed), file=sys.stderr)
+	return num_failures
+
+def main(backend, argv=None):
+	'''Command line entry point for vtab2pdf and vtab2svg.'''
+	ap = argparse.ArgumentParser(
+		description='Render vtab files as %s using lilypond.' % backend.upper())
+	ap.add_argument('-j', '--jobs', type=job_count, metavar='N',
+			help='number of lilypond jobs to run at once ' +
+			     '(default: one per CPU)')
+	ap.add_argument('--lilypond', default='lilypond', metavar='PROGRAM',
+			help='lilypond executable (default: %(default)s)')
+	if backend == 'svg':
+		ap.add_argument('--inkscape', default='inkscape', metavar='PROGRAM',
+				help="inkscape executable, used to fit the canvas " +
+				     "to the drawing (use '' to skip this step, " +
+				     "default: %(default)s)")
+	ap.add_argument('--book', metavar='NAME',
+			help='render every FILE into a single book, NAME.%s, ' % backend +
+			     'using one lilypond process')
+	ap.add_argument('-d', '--define', action='append', default=[],
+			metavar='OPTION',
+			help="lilypond option to define (e.g. 'afive' for " +
+			     "A5 paper), may be repeated")
+	ap.add_argument('--no-cache', action='store_true',
+			help='always run lilypond, ignoring previously ' +
+			     'rendered output')
+	ap.add_argument('--cache-dir', metavar='DIR',
+			help='location of the render cache')
+	ap.add_argument('--cache-size', type=int, metavar='MB',
+			default=RenderCache.DEFAULT_MAX_SIZE // (1024 * 1024),
+			help='maximum size of the render cache ' +
+			     '(default: %(default)s)')
+	ap.add_argument('--watch', action='store_true',
+			help='keep running and re-render each FILE whenever it ' +
+			     'changes (in book mode the whole book is re-rendered)')
+	ap.add_argument('files', nargs='+', metavar='FILE')
+	args = ap.parse_args(argv)
+
+	kwargs = { 'lilypond' : args.lilypond, 'options' : args.define }
+	if backend == 'svg':
+		kwargs['inkscape'] = args.inkscape
+	if not args.no_cache:
+		kwargs['cache'] = RenderCache(args.cache_dir,
+				args.cache_size * 1024 * 1024)
+
+	def render_files(fnames):
+		if args.book:
+			results = [render_book(args.files, args.book, backend, **kwargs)]
+		else:
+			results = render_all(fnames, backend, args.jobs, **kwargs)
+		return _report(results)
+
+	num_failures = render_files(args.files)
+	if args.watch:
+		watch_files(args.files, render_files)
+
+	return 1 if num_failures else 0
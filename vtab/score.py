@@ -0,0 +1,165 @@
+'''An in-memory model of a parsed tab.
+
+A Score records the events produced by VtabParser in compact, columnar
+arrays so that a tab can be parsed once and then rendered by any number
+of formatters, queried or transformed without parsing it again.
+'''
+
+import array
+from fractions import Fraction
+
+from .note import Note, shared, HAMMER_ON, PULL_OFF
+
+ATTRIBUTE = 0
+BARLINE = 1
+NOTE = 2
+
+# Marks an unplayed string in Score.pitches
+NO_NOTE = -32768
+
+# Bits used in Score.articulations
+ARTICULATION_BITS = ((HAMMER_ON, 1), (PULL_OFF, 2))
+
+# Barline attributes are stored as an index into each of these tables
+BARLINE_DOUBLE = (None, 'plain', 'left', 'right', 'both')
+BARLINE_REPEAT = (None, 'open', 'close', 'both')
+
+def encode_barline(attributes):
+	return (BARLINE_DOUBLE.index(attributes.get('double')) *
+			len(BARLINE_REPEAT) +
+			BARLINE_REPEAT.index(attributes.get('repeat')))
+
+def decode_barline(code):
+	(double, repeat) = divmod(code, len(BARLINE_REPEAT))
+	attributes = {}
+	if double:
+		attributes['double'] = BARLINE_DOUBLE[double]
+	if repeat:
+		attributes['repeat'] = BARLINE_REPEAT[repeat]
+	return attributes
+
+class Score(object):
+	'''A parsed tab.
+
+	A Score is also a formatter; it is populated by adding it to a
+	VtabParser (see VtabParser.parse_score()).
+
+	Every event is described by kinds (ATTRIBUTE, BARLINE or NOTE). The
+	details of each kind of event are held, in order, in the following
+	arrays:
+
+	  ATTRIBUTE: attributes, a list of (key, value) tuples
+	  BARLINE:   barlines, encoded using encode_barline()
+	  NOTE:      pitches and articulations (one entry per string),
+	             duration_num and duration_den (the note length as a
+	             fraction of a whole note), ties and bars (the number
+	             of barlines that precede the note)
+	'''
+
+	def __init__(self, strings=6):
+		self.strings = strings
+		self.kinds = array.array('B')
+		self.attributes = []
+		self.barlines = array.array('B')
+		self.pitches = array.array('h')
+		self.articulations = array.array('B')
+		self.duration_num = array.array('q')
+		self.duration_den = array.array('q')
+		self.ties = array.array('B')
+		self.bars = array.array('q')
+
+	def __len__(self):
+		return len(self.kinds)
+
+	def __eq__(self, other):
+		return isinstance(other, Score) and vars(self) == vars(other)
+
+	@property
+	def num_notes(self):
+		return len(self.ties)
+
+	@property
+	def num_bars(self):
+		return len(self.barlines)
+
+	def set_file(self, f):
+		pass
+
+	def format_attribute(self, key, value):
+		self.kinds.append(ATTRIBUTE)
+		self.attributes.append((key, value))
+
+	def format_barline(self, attributes):
+		self.kinds.append(BARLINE)
+		self.barlines.append(encode_barline(attributes))
+
+	def format_note(self, notes, duration, tie):
+		assert(len(notes) == self.strings)
+		self.kinds.append(NOTE)
+		for note in notes:
+			if note is None:
+				self.pitches.append(NO_NOTE)
+				self.articulations.append(0)
+				continue
+			self.pitches.append(int(note))
+			bits = 0
+			if note.articulation:
+				for (articulation, bit) in ARTICULATION_BITS:
+					if note.has_articulation(articulation):
+						bits |= bit
+			self.articulations.append(bits)
+		self.duration_num.append(duration.numerator)
+		self.duration_den.append(duration.denominator)
+		self.ties.append(tie)
+		self.bars.append(len(self.barlines))
+
+	def flush(self):
+		pass
+
+	def note(self, n):
+		'''Return the notes (one per string) of the nth note event.'''
+		notes = []
+		base = n * self.strings
+		for i in range(base, base + self.strings):
+			pitch = self.pitches[i]
+			bits = self.articulations[i]
+			if pitch == NO_NOTE:
+				notes.append(None)
+			elif 0 == bits:
+				notes.append(shared(pitch))
+			else:
+				note = Note(pitch)
+				for (articulation, bit) in ARTICULATION_BITS:
+					if bits & bit:
+						note.add_articulation(articulation)
+				notes.append(note)
+		return tuple(notes)
+
+	def duration(self, n):
+		'''Return the length of the nth note event.'''
+		return Fraction(self.duration_num[n], self.duration_den[n])
+
+	def render(self, *formatters):
+		'''Replay the score into each formatter and then flush them.'''
+		(attribute, barline, note) = (0, 0, 0)
+		for kind in self.kinds:
+			if kind == NOTE:
+				notes = self.note(note)
+				duration = self.duration(note)
+				tie = bool(self.ties[note])
+				for formatter in formatters:
+					formatter.format_note(notes, duration, tie)
+				note += 1
+			elif kind == BARLINE:
+				for formatter in formatters:
+					formatter.format_barline(
+						decode_barline(self.barlines[barline]))
+				barline += 1
+			else:
+				(key, value) = self.attributes[attribute]
+				for formatter in formatters:
+					formatter.format_attribute(key, value)
+				attribute += 1
+
+		for formatter in formatters:
+			formatter.flush()
@@ -0,0 +1,79 @@
+import json
+import sys
+from fractions import Fraction
+
+from vtab.note import Note
+
+class TraceFormatter(object):
+	'''Record every call made to the formatter (like DummyFormatter).
+
+	The trace is buffered and written whenever flush() is called (or
+	the buffer fills up) making it cheap to trace very large inputs.
+	The default text format is identical to the output of
+	DummyFormatter; with json_lines=True each call is instead written
+	as a single line of JSON (JSON Lines):
+
+	  {"event":"format_note","args":[[null,"C3",...],"1/4",false]}
+
+	Notes are written as their name (or as an object with note and
+	articulation members if they have any articulation) and fractions
+	as a "numerator/denominator" string.
+	'''
+
+	BUFFER_SIZE = 1024
+
+	def __init__(self, json_lines=False):
+		self.f = sys.stdout
+		self._buffer = []
+		if json_lines:
+			self._format = self._format_json
+		else:
+			self._format = self._format_text
+
+	def set_file(self, f):
+		self.f = f
+
+	def _format_text(self, name, args, kwargs):
+		if 0 == len(kwargs):
+			return '%s%s\n' % (name, args)
+		return '%s%s%s\n' % (name, args, kwargs)
+
+	def _format_json(self, name, args, kwargs):
+		event = { 'event' : name, 'args' : args }
+		if kwargs:
+			event['kwargs'] = kwargs
+		return json.dumps(event, default=_encode, separators=(',', ':')) + '\n'
+
+	def _write(self):
+		self.f.write(''.join(self._buffer))
+		self._buffer = []
+
+	def _record(self, name, args, kwargs):
+		self._buffer.append(self._format(name, args, kwargs))
+		if len(self._buffer) >= self.BUFFER_SIZE:
+			self._write()
+
+	def __getattr__(self, name):
+		if name.startswith('__'):
+			raise AttributeError(name)
+
+		def trace(*args, **kwargs):
+			self._record(name, args, kwargs)
+
+		# Cache the method so it is only generated once per name
+		setattr(self, name, trace)
+		return trace
+
+	def flush(self, *args, **kwargs):
+		self._record('flush', args, kwargs)
+		self._write()
+
+def _encode(obj):
+	if isinstance(obj, Note):
+		if obj.articulation:
+			return { 'note' : repr(obj),
+				 'articulation' : sorted(obj.articulation) }
+		return repr(obj)
+	if isinstance(obj, Fraction):
+		return '%d/%d' % (obj.numerator, obj.denominator)
+	raise TypeError('cannot trace %r' % (obj,))
@@ -4,21 +4,21 @@ Created on 24 Jun 2013
 @author: drt
 '''
 
-from .note import Note
+from .note import shared
 
 STANDARD_TUNING = (
-		Note('E2'),
-		Note('A2'),
-		Note('D3'),
-		Note('G3'),
-		Note('B3'),
-		Note('E4'))
+		shared('E2'),
+		shared('A2'),
+		shared('D3'),
+		shared('G3'),
+		shared('B3'),
+		shared('E4'))
 
 BASS_TUNING = (
-		Note('E1'),
-		Note('A1'),
-		Note('D2'),
-		Note('G2'))
+		shared('E1'),
+		shared('A1'),
+		shared('D2'),
+		shared('G2'))
 
 def chord(frets, tuning=STANDARD_TUNING):
 	c = []
@@ -1,5 +1,6 @@
 
 
+import functools
 import shlex
 import re
 import sys
@@ -7,7 +8,9 @@ import traceback
 
 from fractions import Fraction
 from vtab import tunings
+from vtab.formatter import Formatter
 import vtab.note
+import vtab.score
 
 class VtabParser(object):
 	'''Match a barline (or underline), yielding barline and decoration
@@ -28,8 +31,29 @@ class VtabParser(object):
 	Template is: " | 10  |  9"'''
 	RE_NOTE = re.compile(r'^\s*[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*')
 
+	'''Classify a line in a single pass. The alternatives are tried in
+	the same order as the individual recognisers above and the name of
+	the group that matched (see lastgroup) identifies the line kind.'''
+	RE_CLASSIFY = re.compile(r'^\s*(?:' +
+			r'(?P<barline>:*[-=]{4}[-=]*:*\s*.*$)|' +
+			r'(?P<comment>#+\s*.*$)|' +
+			r'(?P<keypair>\w+\s*:\s*.*$)|' +
+			r'(?P<note>[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*\s+[hp\-]*[|:0-9]+[\-]*))')
+
+	'''Match any character that str.split() cannot tokenize in exactly
+	the same way as shlex.split() (quotes, escapes, and anything other
+	than printable ASCII, space, tab, CR and LF).'''
+	RE_NEEDS_SHLEX = re.compile(r'[^\x21-\x7e \t\r\n]|[\'"\\]')
+
+	'''Durations are tracked internally as an integer number of ticks
+	(avoiding Fraction arithmetic for every line of tab). A whole note is
+	13440 ticks which allows all the common note lengths, down to 1/128,
+	and triplets, quintuplets and septuplets to be represented exactly.'''
+	TICKS_PER_WHOLE_NOTE = 13440
+
 	def __init__(self):
 		self.formatters = []
+		self._update_dispatch()
 		self.prev_line = None
 
 		self._tuning = tunings.STANDARD_TUNING
@@ -37,28 +61,81 @@ class VtabParser(object):
 
 		self._lineno = 0
 		self._barno = 0
-		self._duration = Fraction(1, 4)
-		self._note_len = Fraction(0, 1)
+		self._duration = self.TICKS_PER_WHOLE_NOTE // 4
+		self._note_len = 0
 		self._tied_note = False
 
 	def add_formatter(self, formatter):
 		if not formatter in self.formatters:
 			self.formatters += formatter,
+		self._update_dispatch()
 
 	def remove_formatter(self, formatter):
 		self.formatters.remove(formatter)
+		self._update_dispatch()
 
-	def format_attribute(self, key, value):
+	def _update_dispatch(self):
+		'''Cache the bound methods that handle each event.
+
+		Attribute handlers are resolved (see _attribute_handlers()) the
+		first time each key is seen.
+		'''
+		self._barline_handlers = tuple([f.format_barline for f in self.formatters])
+		self._note_handlers = tuple([f.format_note for f in self.formatters])
+		self._attribute_cache = {}
+
+	def _attribute_handlers(self, key):
+		handlers = []
 		for formatter in self.formatters:
-			formatter.format_attribute(key, value)
+			# handler() can only be used if format_attribute() has not
+			# been overridden (if it has, it must see every attribute)
+			if isinstance(formatter, Formatter) and \
+					type(formatter).format_attribute is \
+					Formatter.format_attribute:
+				handlers.append(formatter.handler(key))
+			else:
+				handlers.append(functools.partial(formatter.format_attribute, key))
+		handlers = tuple(handlers)
+		self._attribute_cache[key] = handlers
+		return handlers
+
+	def format_attribute(self, key, value):
+		try:
+			handlers = self._attribute_cache[key]
+		except KeyError:
+			handlers = self._attribute_handlers(key)
+		for handler in handlers:
+			handler(value)
 
 	def format_barline(self, line):
-		for formatter in self.formatters:
-			formatter.format_barline(line)
+		for handler in self._barline_handlers:
+			handler(line)
 
 	def format_note(self, note, duration, tied):
-		for formatter in self.formatters:
-			formatter.format_note(note, duration, tied)
+		for handler in self._note_handlers:
+			handler(note, duration, tied)
+
+	def _tokenize(self, line):
+		'''Split a line into tokens, honouring shell-like quoting.
+
+		shlex is comparatively expensive so it is only used for lines
+		that actually contain quoting.
+		'''
+		if self.RE_NEEDS_SHLEX.search(line) is None:
+			return line.split()
+		return shlex.split(line)
+
+	def _to_ticks(self, duration):
+		'''Convert a duration (as a fraction of a whole note) into ticks.
+
+		Durations that cannot be represented exactly (e.g. 1/11) remain as
+		a Fraction; these mix freely with integer ticks so the duration
+		bookkeeping remains exact.
+		'''
+		ticks = duration * self.TICKS_PER_WHOLE_NOTE
+		if ticks.denominator == 1:
+			return ticks.numerator
+		return ticks
 
 	def parse_keypair(self, key, value):
 		lookup  = {
@@ -73,8 +150,9 @@ class VtabParser(object):
 	def parse_decorations(self, decorations):
 		for token in decorations:
 			if token[0].isdigit():
-				self._duration = Fraction(1, int(token))
-				self.format_attribute('duration', self._duration)
+				duration = Fraction(1, int(token))
+				self._duration = self._to_ticks(duration)
+				self.format_attribute('duration', duration)
 				continue
 
 			keypair = self.RE_KEYPAIR.match(token)
@@ -89,7 +167,7 @@ class VtabParser(object):
 		self._flush_current_note(new_bar=(self._barno >= 1))
 		self._barno += 1
 
-		tokens = shlex.split(line)
+		tokens = self._tokenize(line)
 		self.parse_decorations(tokens[1:])
 
 		properties = {}
@@ -121,7 +199,7 @@ class VtabParser(object):
 		self.format_barline(properties)
 
 	def parse_note(self, note):
-		notes = shlex.split(note)
+		notes = self._tokenize(note)
 		decorations = notes[len(self._tuning):]
 
 		def parse_string(open_string, fret):
@@ -131,10 +209,14 @@ class VtabParser(object):
 				articulation = articulation.replace(fret, '')
 				fret = fret.rstrip('-') # Fake voice support
 				note = open_string + int(fret)
-				if 'h' in articulation:
-					note.add_articulation(vtab.note.HAMMER_ON)
-				if 'p' in articulation:
-					note.add_articulation(vtab.note.PULL_OFF)
+				if 'h' in articulation or 'p' in articulation:
+					# note is shared (and immutable) so we must take
+					# a private copy to hold the articulation
+					note = vtab.note.Note(note)
+					if 'h' in articulation:
+						note.add_articulation(vtab.note.HAMMER_ON)
+					if 'p' in articulation:
+						note.add_articulation(vtab.note.PULL_OFF)
 				return note
 			except:
 				return None
@@ -158,8 +240,17 @@ class VtabParser(object):
 	def parse(self, s):
 		'''Categorize the line and handle any error reporting.'''
 		self._lineno += 1
-		barline = self.RE_BARLINE.match(s)
-		if None != barline:
+		m = self.RE_CLASSIFY.match(s)
+		kind = m.lastgroup if m else None
+
+		if kind == 'note':
+			self._flush_prev_line()
+			self.parse_note(s)
+			return
+
+		if kind == 'barline':
+			barline = self.RE_BARLINE.match(s)
+
 			# Handle the special case of titles (meaning the barline is a actually
 			# an underline
 			if (barline.group(2) == '' and self.prev_line != None):
@@ -173,21 +264,16 @@ class VtabParser(object):
 
 		self._flush_prev_line()
 
-		comment = self.RE_COMMENT.match(s)
-		if None != comment:
+		if kind == 'comment':
+			comment = self.RE_COMMENT.match(s)
 			self.format_attribute('comment', comment.group(1))
 			return
 
-		keypair = self.RE_KEYPAIR.match(s)
-		if None != keypair:
+		if kind == 'keypair':
+			keypair = self.RE_KEYPAIR.match(s)
 			self.parse_keypair(keypair.group(1), keypair.group(2))
 			return
 
-		note = self.RE_NOTE.match(s)
-		if None != note:
-			self.parse_note(s)
-			return
-
 		if s.strip() != '': # not whitespace
 			self.prev_line = s
 
@@ -195,8 +281,10 @@ class VtabParser(object):
 		if 0 != self._note_len:
 			if None == self._notes:
 				self._notes = (None,) * len(self._tuning)
-			self.format_note(self._notes, self._note_len, self._tied_note)
-			self._note_len = Fraction(0, 1)
+			self.format_note(self._notes,
+					Fraction(self._note_len, self.TICKS_PER_WHOLE_NOTE),
+					self._tied_note)
+			self._note_len = 0
 			if not new_bar:
 				self._notes = (None,) * len(self._tuning)
 		self._tied_note = new_bar
@@ -214,9 +302,21 @@ class VtabParser(object):
 	def parse_file(self, f):
 		num_errors = 0
 		(self._lineno, saved_lineno) = (0, self._lineno)
-		for ln in f.readlines():
+
+		# Iterate lazily over the file so that very large inputs (or
+		# slow pipes) are processed line-by-line rather than being read
+		# into memory before parsing begins.
+		for ln in f:
+			ln = ln.rstrip()
+			if not ln:
+				# Blank lines only terminate a pending unparseable line
+				# so there is no need to classify them
+				self._lineno += 1
+				self._flush_prev_line()
+				continue
+
 			try:
-				self.parse(ln.rstrip())
+				self.parse(ln)
 			except:
 				print('%s:%d:%d: Internal error (please file a bug report)' %
 						(f.name, self._lineno, 0), file=sys.stderr)
@@ -229,3 +329,31 @@ class VtabParser(object):
 		self._lineno = saved_lineno
 
 		return num_errors
+
+	def new_score(self):
+		'''Return an empty vtab.score.Score that can record the events
+		from this parser (see add_formatter()).'''
+		return vtab.score.Score(len(self._tuning))
+
+	def parse_score(self, f):
+		'''Parse f into a vtab.score.Score (which can then be rendered
+		by any number of formatters without parsing f again).'''
+		score = self.new_score()
+		self.add_formatter(score)
+		try:
+			self.parse_file(f)
+		finally:
+			self.remove_formatter(score)
+		return score
+
+	def parse_path(self, path, encoding='UTF-8'):
+		'''Parse the file at path (using parse_file()).
+
+		The file is streamed, one line at a time, so memory use does not
+		grow with the size of the input. This is deliberately not a memory
+		mapping: mapped pages count towards the resident set size as they
+		are parsed and splitting a mapping into lines in Python is much
+		slower than the io module's line iteration.
+		'''
+		with open(path, encoding=encoding) as f:
+			return self.parse_file(f)
@@ -0,0 +1,77 @@
+'''Watch a set of files and report when their content changes.
+
+Files are polled (so this works on every platform and filesystem). A
+cheap stat() check is made on every poll and the content is only hashed
+once the file has stopped changing for a short while (so an editor that
+saves a file in several steps triggers a single update). Files whose
+timestamp changed but whose content did not are not reported.
+'''
+
+import hashlib
+import os
+import time
+
+def _stat(fname):
+	try:
+		st = os.stat(fname)
+	except FileNotFoundError:
+		return None
+	return (st.st_mtime_ns, st.st_size)
+
+def _hash(fname):
+	try:
+		with open(fname, 'rb') as f:
+			return hashlib.sha256(f.read()).digest()
+	except FileNotFoundError:
+		return None
+
+class Watcher(object):
+	def __init__(self, fnames, debounce=0.2, clock=time.monotonic):
+		self.debounce = debounce
+		self._clock = clock
+		self._stat = {}
+		self._hash = {}
+		self._pending = {}
+
+		for fname in fnames:
+			self._stat[fname] = _stat(fname)
+			self._hash[fname] = _hash(fname)
+
+	def poll(self):
+		'''Return a list of files whose content has changed since they
+		were last reported (or since the watcher was created).'''
+		now = self._clock()
+		changed = []
+
+		for fname in self._stat:
+			st = _stat(fname)
+			if st != self._stat[fname]:
+				self._stat[fname] = st
+				self._pending[fname] = now
+			elif fname in self._pending and \
+					now - self._pending[fname] >= self.debounce:
+				del self._pending[fname]
+				h = _hash(fname)
+				if h != self._hash[fname]:
+					self._hash[fname] = h
+					if h is not None:
+						changed.append(fname)
+
+		return changed
+
+	def watch(self, callback, interval=0.5):
+		'''Call callback with a list of changed files whenever any of
+		the watched files change. Never returns.'''
+		while True:
+			changed = self.poll()
+			if changed:
+				callback(changed)
+			time.sleep(interval)
+
+def watch_files(fnames, callback, interval=0.5, debounce=0.2):
+	'''Command line helper; watch fnames until interrupted by the user.'''
+	watcher = Watcher(fnames, debounce)
+	try:
+		watcher.watch(callback, interval)
+	except KeyboardInterrupt:
+		pass